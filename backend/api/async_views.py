@@ -0,0 +1,80 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial, wraps
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import path
+
+from api.views import IngredientsViewSet, RecipeViewSet, TagViewSet
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    """
+    Пул потоков для ORM создаётся при первом запросе,
+    уже в процессе воркера, а не в мастер-процессе.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.ASGI_ORM_THREADS,
+        thread_name_prefix='orm',
+    )
+
+
+def call_view(view, request, args, kwargs):
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def pooled(view):
+    """
+    Асинхронная версия синхронного представления: цикл событий
+    не блокируется, а ORM работает в ограниченном пуле потоков.
+    """
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            get_executor(),
+            partial(context.run, call_view, view, request, args, kwargs),
+        )
+
+    return async_view
+
+
+def get_async_urls():
+    return [
+        path(
+            'tags/',
+            pooled(TagViewSet.as_view({'get': 'list'})),
+            name='tags-list',
+        ),
+        path(
+            'ingredients/',
+            pooled(IngredientsViewSet.as_view({'get': 'list'})),
+            name='ingredients-list',
+        ),
+        path(
+            'recipes/',
+            pooled(RecipeViewSet.as_view({'get': 'list', 'post': 'create'})),
+            name='recipes-list',
+        ),
+        path(
+            'recipes/<int:pk>/',
+            pooled(RecipeViewSet.as_view({
+                'get': 'retrieve',
+                'put': 'update',
+                'patch': 'partial_update',
+                'delete': 'destroy',
+            })),
+            name='recipes-detail',
+        ),
+    ]
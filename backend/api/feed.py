@@ -0,0 +1,182 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from recipes.models import FeedEntry, Recipe
+from users.models import Follow, User
+
+TRIM_SQL = '''
+DELETE FROM {table} WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY user_id ORDER BY pub_date DESC, recipe_id DESC
+        ) AS position
+        FROM {table} WHERE user_id IN ({users})
+    ) AS ranked WHERE position > %s
+)
+'''
+
+
+def is_fanned_out(author_id):
+    """
+    Рецепты авторов с большим числом подписчиков не раскладываются
+    по лентам, а выбираются при чтении.
+    """
+    return User.objects.filter(
+        id=author_id,
+        followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).exists()
+
+
+def trim_timelines(user_ids):
+    """
+    Оставляет в лентах пользователей не больше FEED_LENGTH
+    самых новых записей.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    sql = TRIM_SQL.format(
+        table=connection.ops.quote_name(FeedEntry._meta.db_table),
+        users=', '.join(['%s'] * len(user_ids)),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*user_ids, settings.FEED_LENGTH])
+
+
+def add_entries(entries):
+    FeedEntry.objects.bulk_create(
+        entries, batch_size=settings.FEED_BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out_recipe(recipe_id):
+    """
+    Добавляет опубликованный рецепт в ленты подписчиков автора.
+    """
+    recipe = Recipe.objects.filter(id=recipe_id).values(
+        'author_id', 'pub_date'
+    ).first()
+    if recipe is None or not is_fanned_out(recipe['author_id']):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=recipe['author_id']
+    ).values_list('user_id', flat=True)
+    batch = []
+    for user_id in follower_ids.iterator(
+        chunk_size=settings.FEED_BATCH_SIZE
+    ):
+        batch.append(user_id)
+        if len(batch) >= settings.FEED_BATCH_SIZE:
+            add_recipe_to_timelines(recipe_id, recipe, batch)
+            batch = []
+    add_recipe_to_timelines(recipe_id, recipe, batch)
+
+
+@transaction.atomic
+def add_recipe_to_timelines(recipe_id, recipe, user_ids):
+    add_entries(
+        FeedEntry(user_id=user_id, recipe_id=recipe_id, **recipe)
+        for user_id in user_ids
+    )
+    trim_timelines(user_ids)
+
+
+def backfill_author(user_id, author_id):
+    """
+    Добавляет в ленту последние рецепты автора после подписки.
+    """
+    if not is_fanned_out(author_id):
+        return
+    recipes = Recipe.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')[:settings.FEED_LENGTH]
+    add_entries(
+        FeedEntry(
+            user_id=user_id,
+            recipe_id=recipe_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for recipe_id, pub_date in recipes
+    )
+    trim_timelines([user_id])
+
+
+def backfill_followers(author_id):
+    """
+    Вызывается после отписки: если подписчиков у автора снова ровно
+    FEED_FANOUT_MAX_FOLLOWERS, его рецепты больше не выбираются
+    при чтении, поэтому последние из них добавляются в ленты
+    оставшихся подписчиков.
+    """
+    if not User.objects.filter(
+        id=author_id,
+        followers_count=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).exists():
+        return
+    recipes = list(Recipe.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')[:settings.FEED_LENGTH])
+    if not recipes:
+        return
+    batch_size = max(1, settings.FEED_BATCH_SIZE // len(recipes))
+    follower_ids = list(Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True))
+    for start in range(0, len(follower_ids), batch_size):
+        user_ids = follower_ids[start:start + batch_size]
+        add_entries(
+            FeedEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for user_id in user_ids
+            for recipe_id, pub_date in recipes
+        )
+        trim_timelines(user_ids)
+
+
+def remove_author(user_id, author_id):
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild_timeline(user_id):
+    """
+    Собирает ленту пользователя заново по его подпискам.
+    """
+    recipes = Recipe.objects.filter(
+        author__following__user_id=user_id,
+        author__followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).order_by('-pub_date', '-id').values_list(
+        'id', 'author_id', 'pub_date'
+    )[:settings.FEED_LENGTH]
+    FeedEntry.objects.filter(user_id=user_id).delete()
+    add_entries(
+        FeedEntry(
+            user_id=user_id,
+            recipe_id=recipe_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for recipe_id, author_id, pub_date in recipes
+    )
+
+
+def get_feed_filter(user):
+    """
+    Условие на рецепты ленты: записи из таблицы лент и рецепты
+    популярных авторов, которые не раскладываются при записи.
+    """
+    condition = Q(id__in=FeedEntry.objects.filter(
+        user=user
+    ).values('recipe_id'))
+    popular_ids = list(Follow.objects.filter(
+        user=user,
+        author__followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).values_list('author_id', flat=True))
+    if popular_ids:
+        condition |= Q(author_id__in=popular_ids)
+    return condition
@@ -1,30 +1,39 @@
 import django_filters
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import filters
 
-from recipes.models import Ingredient, Recipe, Tag
-from users.models import User
+from api.membership import get_user_recipe_ids
+from api.versions import TAGS_VERSION_KEY, get_version
+from recipes.models import FavoriteRecipe, Recipe, RecipesTags, Tag
+from recipes.search import search_recipes
 
+MEMBERSHIP_IN_LIMIT = 500
+TAG_SLUGS_TIMEOUT = 60 * 60 * 24
 
-class IngredientFilter(django_filters.FilterSet):
-    name = django_filters.CharFilter(
-        field_name='name',
-        lookup_expr='icontains'
-    )
 
-    class Meta:
-        model = Ingredient
-        fields = ['name']
+def get_tag_slugs():
+    """
+    Словарь slug -> id тэгов. Ключ кэша включает версию тэгов,
+    поэтому после изменения тэга словарь собирается заново.
+    """
+    key = f'tag_slugs_{get_version(TAGS_VERSION_KEY)}'
+    slugs = cache.get(key)
+    if slugs is None:
+        slugs = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(key, slugs, TAG_SLUGS_TIMEOUT)
+    return slugs
+
+
+def get_tag_choices():
+    return [(slug, slug) for slug in get_tag_slugs()]
 
 
 class RecipeFilter(django_filters.FilterSet):
-    author = filters.ModelChoiceFilter(
-        to_field_name='id',
-        queryset=User.objects.all()
-    )
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all(),
+    author = filters.NumberFilter(field_name='author')
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices,
+        method='filter_tags',
     )
     is_favorited = filters.BooleanFilter(
         field_name='favorite__favorite',
@@ -34,17 +43,47 @@ class RecipeFilter(django_filters.FilterSet):
         field_name='favorite__shopping_cart',
         method='filter_favorite_or_shopping_cart',
     )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
-        fields = ['author', 'tags', 'is_favorited', 'is_in_shopping_cart']
+        fields = [
+            'author',
+            'tags',
+            'is_favorited',
+            'is_in_shopping_cart',
+            'search',
+        ]
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        slugs = get_tag_slugs()
+        return queryset.filter(Exists(RecipesTags.objects.filter(
+            recipe=OuterRef('pk'),
+            tag_id__in=[slugs[slug] for slug in value if slug in slugs],
+        )))
 
     def filter_favorite_or_shopping_cart(self, queryset, name, value):
-        if value:
-            return queryset.filter(
-                favorite__user=self.request.user, **{name: value}
+        kind = name.split('__')[-1]
+        recipe_ids = get_user_recipe_ids(self.request, kind)
+        if len(recipe_ids) > MEMBERSHIP_IN_LIMIT:
+            return self.filter_favorite_or_shopping_cart_in_db(
+                queryset, name, value
             )
+        if value:
+            return queryset.filter(id__in=list(recipe_ids))
+        return queryset.exclude(id__in=list(recipe_ids))
+
+    def filter_favorite_or_shopping_cart_in_db(self, queryset, name, value):
+        in_list = Exists(FavoriteRecipe.objects.filter(
+            recipe=OuterRef('pk'),
+            user=self.request.user,
+            **{name.split('__')[-1]: True},
+        ))
+        return queryset.filter(in_list if value else ~in_list)
 
-        return queryset.exclude(
-            favorite__user=self.request.user, **{name: True}
-        )
+    def filter_search(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+        return search_recipes(queryset, value)
@@ -0,0 +1,116 @@
+import json
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from api.versions import INGREDIENTS_VERSION_KEY, get_version
+from recipes.models import Ingredient
+
+NGRAM_SIZE = 3
+
+
+def ngrams(value):
+    return {
+        value[i:i + NGRAM_SIZE]
+        for i in range(len(value) - NGRAM_SIZE + 1)
+    }
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса: отсортированный список имён
+    для поиска по префиксу и n-граммы для поиска по подстроке.
+    Ответы собираются из заранее сериализованных в JSON записей.
+    """
+
+    _current = None
+    _lock = threading.Lock()
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        rows = sorted(rows, key=lambda row: (row[1].lower(), row[0]))
+        self.keys = [name.lower() for _, name, _ in rows]
+        self.encoded = [
+            json.dumps(
+                {'id': pk, 'name': name, 'measurement_unit': unit},
+                ensure_ascii=False,
+            ).encode()
+            for pk, name, unit in rows
+        ]
+        self.grams = defaultdict(list)
+        for position, key in enumerate(self.keys):
+            for gram in ngrams(key):
+                self.grams[gram].append(position)
+        self.catalog = self.render(range(len(self.keys)))
+
+    @classmethod
+    def from_db(cls):
+        version = get_version(INGREDIENTS_VERSION_KEY)
+        rows = Ingredient.objects.values_list(
+            'id', 'name', 'measurement_unit'
+        )
+        return cls(list(rows), version)
+
+    @classmethod
+    def current(cls):
+        version = get_version(INGREDIENTS_VERSION_KEY)
+        if cls._current is None or cls._current.version != version:
+            with cls._lock:
+                if (
+                    cls._current is None
+                    or cls._current.version != version
+                ):
+                    cls._current = cls.from_db()
+        return cls._current
+
+    def prefix_matches(self, query):
+        position = bisect_left(self.keys, query)
+        while (
+            position < len(self.keys)
+            and self.keys[position].startswith(query)
+        ):
+            yield position
+            position += 1
+
+    def substring_matches(self, query):
+        if len(query) < NGRAM_SIZE:
+            candidates = range(len(self.keys))
+        else:
+            postings = sorted(
+                (self.grams.get(gram, ()) for gram in ngrams(query)),
+                key=len,
+            )
+            candidates = set(postings[0]).intersection(*postings[1:])
+            candidates = sorted(candidates)
+        for position in candidates:
+            key = self.keys[position]
+            if query in key and not key.startswith(query):
+                yield position
+
+    def search(self, query, limit=None):
+        """
+        Позиции подходящих записей: сначала совпадения по префиксу,
+        затем по подстроке, внутри групп - по алфавиту.
+        """
+        query = query.lower()
+        found = []
+        for matches in (
+            self.prefix_matches(query), self.substring_matches(query)
+        ):
+            for position in matches:
+                if limit is not None and len(found) >= limit:
+                    return found
+                found.append(position)
+        return found
+
+    def render(self, positions):
+        return b'[' + b','.join(
+            self.encoded[position] for position in positions
+        ) + b']'
+
+    def search_json(self, query=None, limit=None):
+        if not query:
+            if limit is None:
+                return self.catalog
+            return self.render(range(min(limit, len(self.keys))))
+        return self.render(self.search(query, limit))
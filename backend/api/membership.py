@@ -0,0 +1,112 @@
+from array import array
+from bisect import bisect_left, insort
+from functools import partial
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from recipes.models import FavoriteRecipe
+
+FAVORITE = 'favorite'
+SHOPPING_CART = 'shopping_cart'
+MEMBERSHIP_TIMEOUT = 60 * 60
+REQUEST_ATTRIBUTE = '_user_recipe_ids'
+
+
+class RecipeIdSet:
+    """
+    Множество id рецептов в виде отсортированного массива uint32.
+    В кэше хранится как bytes.
+    """
+
+    def __init__(self, ids=()):
+        self.ids = array('I', sorted(ids))
+
+    @classmethod
+    def from_bytes(cls, content):
+        instance = cls()
+        instance.ids.frombytes(content)
+        return instance
+
+    def to_bytes(self):
+        return self.ids.tobytes()
+
+    def __contains__(self, recipe_id):
+        position = bisect_left(self.ids, recipe_id)
+        return position < len(self.ids) and self.ids[position] == recipe_id
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, recipe_id):
+        if recipe_id not in self:
+            insort(self.ids, recipe_id)
+
+    def discard(self, recipe_id):
+        position = bisect_left(self.ids, recipe_id)
+        if position < len(self.ids) and self.ids[position] == recipe_id:
+            del self.ids[position]
+
+
+def get_version_key(user_id):
+    return f'recipe_ids_version_{user_id}'
+
+
+def bump_version(user_id):
+    version = uuid4().hex
+    cache.set(get_version_key(user_id), version, None)
+    return version
+
+
+def get_version(user_id):
+    return cache.get(get_version_key(user_id)) or bump_version(user_id)
+
+
+def get_cache_key(user_id, kind, version):
+    return f'{kind}_ids_{user_id}_{version}'
+
+
+def load_recipe_ids(user_id, kind, version):
+    """
+    Версия читается до запроса к БД: если параллельная запись
+    сменит версию, собранное здесь множество уйдёт в старый ключ
+    и читаться больше не будет.
+    """
+    key = get_cache_key(user_id, kind, version)
+    content = cache.get(key)
+    if content is not None:
+        return RecipeIdSet.from_bytes(content)
+    recipe_ids = RecipeIdSet(FavoriteRecipe.objects.filter(
+        user_id=user_id, **{kind: True}
+    ).order_by().values_list('recipe_id', flat=True))
+    cache.set(key, recipe_ids.to_bytes(), MEMBERSHIP_TIMEOUT)
+    return recipe_ids
+
+
+def get_user_recipe_ids(request, kind):
+    """
+    Id рецептов пользователя в избранном или в корзине.
+    Загружается из кэша один раз за запрос.
+    """
+    user = request.user
+    if user.is_anonymous:
+        return RecipeIdSet()
+    loaded = getattr(request, REQUEST_ATTRIBUTE, None)
+    if loaded is None:
+        loaded = {'version': get_version(user.id)}
+        setattr(request, REQUEST_ATTRIBUTE, loaded)
+    if kind not in loaded:
+        loaded[kind] = load_recipe_ids(user.id, kind, loaded['version'])
+    return loaded[kind]
+
+
+def invalidate_user_recipe_ids(user_id):
+    """
+    Меняет версию множеств пользователя после коммита:
+    следующее чтение соберёт их из БД заново.
+    """
+    transaction.on_commit(partial(bump_version, user_id))
@@ -1,12 +1,21 @@
+from functools import partial
+
 from django.db import transaction
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
+from rest_framework.utils import html
 from rest_framework.validators import UniqueTogetherValidator
 
-from recipes.models import (FavoriteRecipe, Ingredient, IngredientsInRecipes,
-                            Recipe, RecipesTags, Tag)
+from api.feed import fan_out_recipe
+from api.membership import FAVORITE, SHOPPING_CART, get_user_recipe_ids
+from api.uploads import UploadedImageField
+from core.counters import change_counter
+from recipes.models import (Ingredient, IngredientsInRecipes, Recipe,
+                            RecipesTags, ShoppingListExport, Tag)
 from users.models import Follow, User
 from users.serializers import CustomUserSerializer
+from utils.image_renditions import delete_renditions, get_image_srcset
+
+RECIPES_LIMIT = 3
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -35,10 +44,7 @@ class IngredientsInRecipesSerialize(serializers.ModelSerializer):
     Сериализатор для вывода количества ингредиентов в рецепте.
     """
 
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        source='ingredient'
-    )
+    id = serializers.IntegerField(source='ingredient_id')
     name = serializers.CharField(
         read_only=True,
         source='ingredient.name'
@@ -61,7 +67,8 @@ class RecipeSerializer(serializers.ModelSerializer):
     author = CustomUserSerializer(
         read_only=True, default=serializers.CurrentUserDefault()
     )
-    image = Base64ImageField()
+    image = UploadedImageField()
+    image_srcset = serializers.SerializerMethodField()
     tags = TagSerializer(read_only=True,
                          many=True,
                          )
@@ -73,7 +80,15 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        exclude = ['created', 'pub_date']
+        exclude = [
+            'created',
+            'pub_date',
+            'search_vector',
+            'favorites_count',
+            'in_carts_count',
+            'image_renditions',
+            'renditions_claimed',
+        ]
 
         validators = [
             UniqueTogetherValidator(
@@ -83,33 +98,50 @@ class RecipeSerializer(serializers.ModelSerializer):
             )
         ]
 
+    def get_user_recipe_flag(self, obj, kind):
+        return obj.id in get_user_recipe_ids(self.context['request'], kind)
+
     def get_is_favorited(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        recipe = FavoriteRecipe.objects.filter(
-            user__id=user.id, recipe__id=obj.id
-        ).first()
-        return recipe.favorite if recipe else False
+        return self.get_user_recipe_flag(obj, FAVORITE)
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        recipe = FavoriteRecipe.objects.filter(
-            user__id=user.id, recipe__id=obj.id
-        ).first()
-        return recipe.shopping_cart if recipe else False
+        return self.get_user_recipe_flag(obj, SHOPPING_CART)
+
+    def get_image_srcset(self, obj):
+        return get_image_srcset(obj, self.context.get('request'))
+
+    def get_initial_list(self, field_name):
+        if html.is_html_input(self.initial_data):
+            return self.initial_data.getlist(field_name)
+        return self.initial_data.get(field_name)
+
+    def get_tags_ids(self):
+        tags_ids = self.get_initial_list('tags')
+        if not tags_ids:
+            raise serializers.ValidationError({
+                'tags': 'Нужно выбрать хотя бы один тэг!'
+            })
+        try:
+            tags_ids = serializers.ListField(
+                child=serializers.IntegerField()
+            ).to_internal_value(tags_ids)
+        except serializers.ValidationError:
+            raise serializers.ValidationError({'tags': 'Тэг не найден!'})
+        if len(set(tags_ids)) != len(tags_ids):
+            raise serializers.ValidationError({
+                'tags': 'Тэги должны быть уникальными!'
+            })
+        return tags_ids
 
     def validate(self, data):
-        ingredients = self.initial_data.get('ingredients')
+        ingredients = data.get('ingredient_in_recipe')
         if not ingredients:
             raise serializers.ValidationError(
                 {'error': 'Отсутствует информация об ингредиентах'}
             )
         lst_unique_ingredients = []
         for ingredient in ingredients:
-            ingredient_id = ingredient['id']
+            ingredient_id = ingredient['ingredient_id']
             if ingredient_id in lst_unique_ingredients:
                 raise serializers.ValidationError({
                     'ingredients': 'Ингредиенты должны быть уникальными!'
@@ -120,47 +152,100 @@ class RecipeSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError({
                     'amount': 'Количество ингредиента должно быть больше нуля!'
                 })
-        tags_ids = self.initial_data.get('tags')
-        if not tags_ids:
+        tags_list = self.get_tags_ids()
+        tags = Tag.objects.in_bulk(tags_list)
+        if len(tags) != len(tags_list):
             raise serializers.ValidationError({
-                'tags': 'Нужно выбрать хотя бы один тэг!'
+                'tags': 'Тэг не найден!'
             })
-        tags_list = []
-        for tag in tags_ids:
-            if tag in tags_list:
-                raise serializers.ValidationError({
-                    'tags': 'Тэги должны быть уникальными!'
-                })
-            tags_list.append(tag)
+        data['tags'] = list(tags)
+        amounts = {
+            ingredient['ingredient_id']: ingredient['amount']
+            for ingredient in data['ingredient_in_recipe']
+        }
+        found = Ingredient.objects.filter(id__in=amounts).count()
+        if found != len(amounts):
+            raise serializers.ValidationError({
+                'ingredients': 'Ингредиент не найден!'
+            })
+        data['ingredient_in_recipe'] = amounts
         return data
 
-    def create_ingredient_tags_in_recipe(self, recipe, ingredients, tags_ids):
-        ingredient_recipe_list = [IngredientsInRecipes(
-            recipe=recipe,
-            ingredient=ingredient['ingredient'],
-            amount=ingredient['amount']) for ingredient in ingredients]
-        IngredientsInRecipes.objects.bulk_create(ingredient_recipe_list)
-        tag_list = [RecipesTags(
-            recipe=recipe,
-            tag=Tag.objects.get(id=tags_id)) for tags_id in tags_ids]
-        RecipesTags.objects.bulk_create(tag_list)
+    def create_ingredient_tags_in_recipe(self, recipe, amounts, tags_ids):
+        IngredientsInRecipes.objects.bulk_create(
+            IngredientsInRecipes(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in amounts.items()
+        )
+        RecipesTags.objects.bulk_create(
+            RecipesTags(recipe=recipe, tag_id=tag_id) for tag_id in tags_ids
+        )
+
+    def update_ingredients_in_recipe(self, recipe, amounts):
+        existing = {
+            row.ingredient_id: row
+            for row in recipe.ingredient_in_recipe.all()
+        }
+        removed = existing.keys() - amounts.keys()
+        if removed:
+            IngredientsInRecipes.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for ingredient_id, row in existing.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and row.amount != amount:
+                row.amount = amount
+                changed.append(row)
+        if changed:
+            IngredientsInRecipes.objects.bulk_update(changed, ('amount',))
+        added = amounts.keys() - existing.keys()
+        if added:
+            IngredientsInRecipes.objects.bulk_create(
+                IngredientsInRecipes(
+                    recipe=recipe,
+                    ingredient_id=ingredient_id,
+                    amount=amounts[ingredient_id],
+                )
+                for ingredient_id in added
+            )
+
+    def update_tags_in_recipe(self, recipe, tags_ids):
+        existing = {tag.id for tag in recipe.tags.all()}
+        removed = existing - set(tags_ids)
+        if removed:
+            RecipesTags.objects.filter(
+                recipe=recipe, tag_id__in=removed
+            ).delete()
+        added = set(tags_ids) - existing
+        if added:
+            RecipesTags.objects.bulk_create(
+                RecipesTags(recipe=recipe, tag_id=tag_id) for tag_id in added
+            )
 
     @transaction.atomic
     def create(self, validated_data):
-        ingredients = validated_data.pop('ingredient_in_recipe')
-        tags_ids = self.initial_data.pop('tags')
+        amounts = validated_data.pop('ingredient_in_recipe')
+        tags_ids = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data)
-        self.create_ingredient_tags_in_recipe(recipe, ingredients, tags_ids)
+        change_counter(User, recipe.author_id, 'recipes_count', 1)
+        transaction.on_commit(partial(fan_out_recipe, recipe.id))
+        self.create_ingredient_tags_in_recipe(recipe, amounts, tags_ids)
         return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
-        instance.ingredients.clear()
-        instance.tags.clear()
-
-        ingredients = validated_data.pop('ingredient_in_recipe')
-        tags_ids = self.initial_data.pop('tags')
-        self.create_ingredient_tags_in_recipe(instance, ingredients, tags_ids)
+        if 'image' in validated_data:
+            if instance.image_renditions:
+                transaction.on_commit(partial(
+                    delete_renditions, instance.image_renditions
+                ))
+            validated_data['image_renditions'] = None
+        self.update_ingredients_in_recipe(
+            instance, validated_data.pop('ingredient_in_recipe')
+        )
+        self.update_tags_in_recipe(instance, validated_data.pop('tags'))
         return super().update(instance, validated_data)
 
 
@@ -168,10 +253,14 @@ class FavoriteRecipeSerializer(serializers.ModelSerializer):
     """
     Сериализатор для избранных рецептов.
     """
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_srcset', 'cooking_time')
+
+    def get_image_srcset(self, obj):
+        return get_image_srcset(obj, self.context.get('request'))
 
 
 class FollowSerializer(serializers.ModelSerializer):
@@ -196,15 +285,32 @@ class FollowSerializer(serializers.ModelSerializer):
         model = User
 
     def get_is_subscribed(self, obj):
+        is_subscribed = getattr(obj, 'is_subscribed', None)
+        if is_subscribed is not None:
+            return is_subscribed
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
         return Follow.objects.filter(author=obj, user=user).exists()
 
     def get_recipes(self, obj):
-        recipes = Recipe.objects.filter(author=obj).all()
-        recipes = recipes[:3]
+        recipes = getattr(obj, 'latest_recipes', None)
+        if recipes is None:
+            limit = self.context.get('recipes_limit', RECIPES_LIMIT)
+            recipes = Recipe.objects.filter(author=obj)[:limit]
         return FavoriteRecipeSerializer(recipes, many=True).data
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj).count()
+        return obj.recipes_count
+
+
+class ShoppingListExportSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для статуса выгрузки списка покупок.
+    """
+
+    class Meta:
+        model = ShoppingListExport
+        fields = (
+            'id', 'status', 'created', 'finished', 'render_time', 'size'
+        )
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.membership import invalidate_user_recipe_ids
+from api.versions import (INGREDIENTS_VERSION_KEY, TAGS_VERSION_KEY,
+                          bump_version)
+from recipes.models import FavoriteRecipe, Ingredient, Tag
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def ingredients_changed(**kwargs):
+    bump_version(INGREDIENTS_VERSION_KEY)
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def tags_changed(**kwargs):
+    bump_version(TAGS_VERSION_KEY)
+
+
+@receiver([post_save, post_delete], sender=FavoriteRecipe)
+def user_recipe_ids_changed(instance, **kwargs):
+    invalidate_user_recipe_ids(instance.user_id)
@@ -0,0 +1,138 @@
+import base64
+import binascii
+import uuid
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from PIL import Image
+from rest_framework import serializers
+
+from core.metrics import span
+
+BASE64_CHUNK_SIZE = 256 * 1024
+IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+TOO_LARGE_MESSAGE = 'Размер картинки не должен превышать {max_size} байт.'
+
+
+def too_large_message():
+    return TOO_LARGE_MESSAGE.format(max_size=settings.IMAGE_UPLOAD_MAX_BYTES)
+
+
+class ImageUploadLimitHandler(FileUploadHandler):
+    """
+    Прерывает разбор multipart-запроса,
+    как только загружаемый файл превышает лимит.
+    """
+
+    def handle_raw_input(
+        self, input_data, meta, content_length, boundary, encoding=None
+    ):
+        limit = settings.IMAGE_UPLOAD_MAX_BYTES
+        if settings.DATA_UPLOAD_MAX_MEMORY_SIZE is not None:
+            limit += settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        if content_length > limit:
+            raise serializers.ValidationError({'image': [too_large_message()]})
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError({'image': [too_large_message()]})
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class UploadedImageField(serializers.ImageField):
+    """
+    Картинка строкой base64 или файлом из multipart-запроса.
+    Base64 декодируется по частям во временный файл,
+    размеры проверяются по заголовку до декодирования остатка.
+    """
+
+    default_error_messages = {
+        'invalid_base64': 'Картинка должна быть закодирована в base64.',
+        'invalid_image': 'Загрузите корректную картинку.',
+        'too_many_pixels': 'Картинка не должна превышать {max_pixels} пикс.',
+    }
+
+    @span('image_decode')
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = self.decode(data)
+        elif getattr(data, 'size', 0) > settings.IMAGE_UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError(too_large_message())
+        file = super(serializers.ImageField, self).to_internal_value(data)
+        if self.read_header(file) is None:
+            self.fail('invalid_image')
+        self.verify(file)
+        return file
+
+    def decode(self, data):
+        payload = data.partition(';base64,')[2] or data
+        size = len(payload) * 3 // 4 - payload[-2:].count('=')
+        if size > settings.IMAGE_UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError(too_large_message())
+        file = SpooledTemporaryFile(max_size=settings.IMAGE_UPLOAD_SPOOL_SIZE)
+        image_format = None
+        for start in range(0, len(payload), BASE64_CHUNK_SIZE):
+            try:
+                file.write(base64.b64decode(
+                    payload[start:start + BASE64_CHUNK_SIZE], validate=True
+                ))
+            except binascii.Error:
+                file.close()
+                self.fail('invalid_base64')
+            if image_format is None:
+                image_format = self.read_header(file)
+        image_format = image_format or self.read_header(file)
+        if image_format is None:
+            file.close()
+            self.fail('invalid_image')
+        return UploadedFile(
+            file,
+            name=f'{uuid.uuid4()}.{image_format.lower()}',
+            content_type=f'image/{image_format.lower()}',
+            size=file.tell(),
+        )
+
+    def read_header(self, file):
+        """
+        Формат картинки по заголовку или None, если заголовок
+        ещё не прочитан целиком. Пиксели не декодируются.
+        """
+        position = file.tell()
+        file.seek(0)
+        try:
+            with Image.open(file) as image:
+                image_format, (width, height) = image.format, image.size
+        except Image.DecompressionBombError:
+            width = height = settings.IMAGE_UPLOAD_MAX_PIXELS
+        except (OSError, SyntaxError, ValueError):
+            return None
+        finally:
+            file.seek(position)
+        if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            self.fail(
+                'too_many_pixels',
+                max_pixels=settings.IMAGE_UPLOAD_MAX_PIXELS,
+            )
+        if image_format not in IMAGE_FORMATS:
+            self.fail('invalid_image')
+        return image_format
+
+    def verify(self, file):
+        file.seek(0)
+        try:
+            with Image.open(file) as image:
+                image.verify()
+        except Exception:
+            self.fail('invalid_image')
+        finally:
+            file.seek(0)
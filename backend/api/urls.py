@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
@@ -13,3 +14,8 @@ router.register('ingredients', IngredientsViewSet, basename='ingredients')
 urlpatterns = [
     path('', include(router.urls)),
 ]
+
+if settings.ASYNC_VIEWS:
+    from api.async_views import get_async_urls
+
+    urlpatterns = get_async_urls() + urlpatterns
@@ -1,10 +1,105 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from rest_framework import status
+from rest_framework.negotiation import DefaultContentNegotiation
 from rest_framework.response import Response
 
-from api.serializers import FavoriteRecipeSerializer
+from api.serializers import RECIPES_LIMIT, FavoriteRecipeSerializer
+from api.versions import get_version
+from core.counters import change_counter
 from recipes.models import FavoriteRecipe, Recipe
 
+LIST_COUNTERS = {
+    'FAVORITE': 'favorites_count',
+    'SHOPPING_CART': 'in_carts_count',
+}
+
+
+def get_recipes_limit(request):
+    try:
+        limit = int(request.query_params['recipes_limit'])
+    except (KeyError, ValueError):
+        return RECIPES_LIMIT
+    return max(limit, 0)
+
+
+def attach_latest_recipes(authors, limit):
+    """
+    Одним запросом с оконной функцией выбирает до limit последних
+    рецептов каждого автора и сохраняет их в author.latest_recipes.
+    """
+    recipes = defaultdict(list)
+    if authors and limit:
+        ranked = Recipe.objects.filter(
+            author__in=authors
+        ).annotate(position=Window(
+            RowNumber(),
+            partition_by=[F('author_id')],
+            order_by=[F('pub_date').desc(), F('id').desc()],
+        )).order_by().values(
+            'id', 'author_id', 'name', 'image', 'image_renditions',
+            'cooking_time', 'position',
+        )
+        sql, params = ranked.query.sql_with_params()
+        for recipe in Recipe.objects.raw(
+            f'SELECT * FROM ({sql}) ranked WHERE position <= %s '
+            'ORDER BY author_id, position',
+            (*params, limit),
+        ):
+            recipes[recipe.author_id].append(recipe)
+    for author in authors:
+        author.latest_recipes = recipes[author.id]
+    return authors
+
+
+class ConditionalCatalogMixin:
+    """
+    Отдаёт ETag и Last-Modified по метке версии справочника
+    и отвечает 304 на повторные запросы с совпадающей меткой.
+    """
+    version_key = None
+
+    def get_catalog_version(self):
+        return get_version(self.version_key)
+
+    def conditional_response(self, request, render):
+        version = self.get_catalog_version()
+        etag = quote_etag(f'{self.version_key}-{version}')
+        last_modified = int(float(version))
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = render(version)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, public=True, max_age=0)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            lambda version: super(ConditionalCatalogMixin, self).retrieve(
+                request, *args, **kwargs
+            ),
+        )
+
+
+class FileFormatNegotiation(DefaultContentNegotiation):
+    """
+    Параметр format задаёт формат файла, а не рендерер DRF:
+    ответы с данными всегда отдаются первым рендерером.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
 
 class FavoriteCreate:
     def get_recipe_by_id(self, id):
@@ -21,16 +116,22 @@ class FavoriteCreate:
             c_def.favorite = add
         if type_of_list == 'SHOPPING_CART':
             c_def.shopping_cart = add
+        with transaction.atomic():
+            c_def.save()
+            change_counter(
+                Recipe,
+                c_def.recipe_id,
+                LIST_COUNTERS[type_of_list],
+                1 if add else -1,
+            )
 
     def recipe_favorite_or_shopping(self, request, id, type_of_list, help):
         c_def = self.get_or_create_in_favoritrecipe(id)
         if help is False:
             self.add_to_list_or_delete(type_of_list, c_def)
-            c_def.save()
             c_def_help = self.get_recipe_by_id(id)
             serializer = FavoriteRecipeSerializer(c_def_help)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
             self.add_to_list_or_delete(type_of_list, c_def, add=False)
-            c_def.save()
             return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,20 @@
+import time
+
+from django.core.cache import caches
+
+TAGS_VERSION_KEY = 'tags_version'
+INGREDIENTS_VERSION_KEY = 'ingredients_version'
+
+
+def bump_version(key):
+    """
+    Метка версии - время последнего изменения данных.
+    Используется для ETag, Last-Modified и ключей кэша.
+    """
+    stamp = '%.6f' % time.time()
+    caches['versions'].set(key, stamp, None)
+    return stamp
+
+
+def get_version(key):
+    return caches['versions'].get(key) or bump_version(key)
@@ -1,96 +1,267 @@
-from django.db.models import Sum
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Sum, Value
+from django.http import FileResponse, HttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django_filters import rest_framework as filters
-from rest_framework import filters as rest_filters
-from rest_framework import viewsets
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 
-from api.filters import IngredientFilter, RecipeFilter
-from api.paginations import CustomPageSizePagination
+from api.feed import get_feed_filter
+from api.filters import RecipeFilter
+from api.ingredient_index import IngredientIndex
+from api.paginations import CursorOrPageNumberPagination, KeysetPagination
 from api.permissions import AdminOrAuthorOrReadOnly
 from api.serializers import (IngredientSerialize, RecipeSerializer,
-                             TagSerializer)
-from api.utils import FavoriteCreate
-from recipes.models import FavoriteRecipe, Ingredient, Recipe, Tag
+                             ShoppingListExportSerializer, TagSerializer)
+from api.uploads import ImageUploadLimitHandler
+from api.utils import (ConditionalCatalogMixin, FavoriteCreate,
+                       FileFormatNegotiation)
+from api.versions import INGREDIENTS_VERSION_KEY, TAGS_VERSION_KEY
+from core.counters import change_counter
+from recipes.models import (FavoriteRecipe, Ingredient, IngredientsInRecipes,
+                            Recipe, ShoppingListExport, Tag)
+from users.models import Follow, User
 from utils.create_pdf_file import create_pdf
+from utils.shopping_list_formats import FORMATS as SHOPPING_LIST_FORMATS
+from utils.shopping_list_formats import stream_shopping_list
 
+SHOPPING_CART_CHUNK_SIZE = 500
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+
+def render_tags(version):
+    """
+    Список тэгов в JSON, закэшированный по версии тэгов.
+    """
+    key = f'tags_list_{version}'
+    content = cache.get(key)
+    if content is None:
+        content = JSONRenderer().render(
+            TagSerializer(Tag.objects.all(), many=True).data
+        )
+        cache.set(key, content)
+    return content
+
+
+class TagViewSet(ConditionalCatalogMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    version_key = TAGS_VERSION_KEY
 
+    def render_list(self, version):
+        return HttpResponse(
+            render_tags(version), content_type='application/json'
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, self.render_list)
 
-class IngredientsViewSet(viewsets.ReadOnlyModelViewSet):
+
+class IngredientsViewSet(ConditionalCatalogMixin,
+                         viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerialize
-    filter_backends = (filters.DjangoFilterBackend, rest_filters.SearchFilter)
-    filterset_class = IngredientFilter
     pagination_class = None
-    filterset_fields = ('name',)
-    search_fields = ('^name',)
+    version_key = INGREDIENTS_VERSION_KEY
+
+    def render_list(self, version):
+        request = self.request
+        query = (
+            request.query_params.get('name')
+            or request.query_params.get('search')
+        )
+        try:
+            limit = int(request.query_params['limit'])
+        except (KeyError, ValueError):
+            limit = None
+        if limit is not None and limit < 0:
+            limit = None
+        return HttpResponse(
+            IngredientIndex.current().search_json(query, limit),
+            content_type='application/json',
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, self.render_list)
 
 
 class RecipeViewSet(FavoriteCreate, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = (AdminOrAuthorOrReadOnly,)
-    pagination_class = CustomPageSizePagination
+    pagination_class = CursorOrPageNumberPagination
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers.insert(0, ImageUploadLimitHandler(request))
+        return super().initialize_request(request, *args, **kwargs)
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_anonymous:
+            is_subscribed = Value(False)
+        else:
+            is_subscribed = Exists(
+                Follow.objects.filter(user=user, author=OuterRef('pk'))
+            )
+        return Recipe.objects.prefetch_related(
+            Prefetch(
+                'author',
+                queryset=User.objects.annotate(is_subscribed=is_subscribed),
+            ),
+            'tags',
+            Prefetch(
+                'ingredient_in_recipe',
+                queryset=IngredientsInRecipes.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
+
     def perform_create(self, serializer):
         serializer.save(
             author=self.request.user
         )
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        change_counter(User, instance.author_id, 'recipes_count', -1)
+
     def perform_update(self, serializer):
         serializer.save(
             author=self.request.user
         )
 
-    @action(
-        detail=False,
-        permission_classes=[IsAuthenticated],
-        url_path='download_shopping_cart',
-    )
-    def get_shopping_cart(self, request):
-        shopping_cart_to_download = Ingredient.objects.filter(
+    def get_shopping_cart_rows(self):
+        return Ingredient.objects.filter(
             ingredient_in_recipe__recipe__favorite__user=self.request.user,
             ingredient_in_recipe__recipe__favorite__shopping_cart=True,
-        ).annotate(total=Sum('ingredient_in_recipe__amount')).values(
-            'name',
-            'total',
-            'measurement_unit',
+        ).values_list('name', 'measurement_unit').annotate(
+            total=Sum('ingredient_in_recipe__amount')
+        ).order_by('name')
+
+    def get_shopping_cart_file_name(self, extension):
+        return '%s_%s.%s' % (
+            timezone.now().strftime('%Y-%m-%d'),
+            self.request.user.username,
+            extension,
         )
 
-        shopping_cart_context = {
-            'file_name': '%s_%s.pdf'
-            % (
-                timezone.now().strftime('%Y-%m-%d'),
-                self.request.user.username,
-            ),
-            'title': 'Список покупок',
-            'user': 'Пользователь: %s %s'
-            % (
+    def get_shopping_cart_header(self):
+        return (
+            'Список покупок',
+            'Пользователь: %s %s' % (
                 self.request.user.last_name,
                 self.request.user.first_name,
             ),
+        )
+
+    def get_shopping_cart_context(self):
+        title, user = self.get_shopping_cart_header()
+        shopping_cart_context = {
+            'file_name': self.get_shopping_cart_file_name('pdf'),
+            'title': title,
+            'user': user,
             'text': [],
         }
         data = {}
-        for item in shopping_cart_to_download:
-            name = item['name'].capitalize()
-            unit = item['measurement_unit']
-            amount = item['total']
-            data[name] = [amount, unit]
+        for name, unit, amount in self.get_shopping_cart_rows():
+            data[name.capitalize()] = [amount, unit]
 
         for idx, (key, value) in enumerate(data.items()):
             shopping_cart_context['text'].append(
                 f'{idx + 1}. {key} - ' f'{value[0]} ' f'{value[1]}'
             )
-        return create_pdf(shopping_cart_context)
+        return shopping_cart_context
+
+    def stream_shopping_cart(self, file_format):
+        rows = self.get_shopping_cart_rows().iterator(
+            chunk_size=SHOPPING_CART_CHUNK_SIZE
+        )
+        if settings.ASYNC_VIEWS:
+            # Под ASGI Django перебирает StreamingHttpResponse в цикле
+            # событий, где ORM недоступен: строки читаются здесь, в потоке
+            # представления, а в цикле событий только форматируются.
+            rows = list(rows)
+        return stream_shopping_list(
+            file_format,
+            self.get_shopping_cart_file_name(file_format),
+            *self.get_shopping_cart_header(),
+            rows,
+        )
+
+    @action(
+        detail=False,
+        permission_classes=[IsAuthenticated],
+        pagination_class=KeysetPagination,
+    )
+    def feed(self, request):
+        page = self.paginate_queryset(
+            self.get_queryset().filter(get_feed_filter(request.user))
+        )
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        permission_classes=[IsAuthenticated],
+        url_path='download_shopping_cart',
+        content_negotiation_class=FileFormatNegotiation,
+    )
+    def get_shopping_cart(self, request):
+        file_format = request.query_params.get('format', 'pdf')
+        if file_format in SHOPPING_LIST_FORMATS:
+            return self.stream_shopping_cart(file_format)
+        if file_format != 'pdf':
+            raise ValidationError({
+                'format': 'Доступные форматы: pdf, %s.'
+                % ', '.join(SHOPPING_LIST_FORMATS)
+            })
+        shopping_cart_context = self.get_shopping_cart_context()
+        if request.query_params.get('mode') != 'async':
+            return create_pdf(shopping_cart_context)
+
+        job = ShoppingListExport.objects.create(
+            user=request.user, context=shopping_cart_context
+        )
+        return Response(
+            ShoppingListExportSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    @action(
+        detail=False,
+        permission_classes=[IsAuthenticated],
+        url_path=r'download_shopping_cart/(?P<job_id>[0-9]+)',
+    )
+    def shopping_cart_export(self, request, job_id):
+        job = get_object_or_404(
+            ShoppingListExport, id=job_id, user=request.user
+        )
+        if job.status == ShoppingListExport.FAILED:
+            return Response(
+                ShoppingListExportSerializer(job).data,
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        if job.status != ShoppingListExport.DONE:
+            return Response(
+                ShoppingListExportSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED,
+            )
+        return FileResponse(
+            job.file.open('rb'),
+            as_attachment=True,
+            filename=job.context['file_name'],
+        )
 
     @action(
         methods=['POST', 'DELETE'],
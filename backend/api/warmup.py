@@ -0,0 +1,27 @@
+from django.core.cache import cache
+from django.db import connections
+from PIL import Image
+
+from api.filters import get_tag_slugs
+from api.ingredient_index import IngredientIndex
+from api.versions import TAGS_VERSION_KEY, get_version
+from api.views import render_tags
+from utils.create_pdf_file import register_font
+
+
+def warm_up():
+    """
+    Заполняет общие кэши и состояние процесса до запуска воркеров:
+    шрифт для PDF, плагины Pillow, тэги и индекс ингредиентов.
+    Соединения с БД и кэшем закрываются, чтобы воркеры
+    не унаследовали их после fork.
+    """
+    try:
+        register_font()
+        Image.init()
+        get_tag_slugs()
+        render_tags(get_version(TAGS_VERSION_KEY))
+        IngredientIndex.current()
+    finally:
+        connections.close_all()
+        cache.close()
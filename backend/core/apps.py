@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core.metrics import install_query_tracker, instrument_serializers
+
+        instrument_serializers()
+        connection_created.connect(install_query_tracker)
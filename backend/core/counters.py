@@ -0,0 +1,29 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def change_counter(model, pk, field, delta):
+    """
+    Атомарно меняет счётчик на delta одним UPDATE с F()-выражением.
+    Значение не опускается ниже нуля.
+    """
+    if not delta:
+        return
+    value = F(field) + delta
+    if delta < 0:
+        value = Greatest(value, 0)
+    model.objects.filter(pk=pk).update(**{field: value})
+
+
+def count_subquery(model, field, **filters):
+    """
+    Коррелированный подзапрос: число строк model, ссылающихся
+    через field на текущую строку внешнего запроса.
+    """
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}, **filters)
+        .order_by()
+        .values(field)
+        .annotate(count=Count('pk'))
+        .values('count')
+    ), 0)
@@ -0,0 +1,160 @@
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import (REGISTRY, CollectorRegistry, Histogram,
+                               generate_latest, multiprocess)
+
+MULTIPROCESS_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+SECONDS_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+VIEW_LABELS = ('view', 'action')
+
+REQUEST_SECONDS = Histogram(
+    'foodgram_request_seconds',
+    'Полное время обработки запроса.',
+    VIEW_LABELS,
+    buckets=SECONDS_BUCKETS,
+)
+DB_SECONDS = Histogram(
+    'foodgram_request_db_seconds',
+    'Суммарное время SQL-запросов за запрос.',
+    VIEW_LABELS,
+    buckets=SECONDS_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'foodgram_request_db_queries',
+    'Число SQL-запросов за запрос.',
+    VIEW_LABELS,
+    buckets=QUERIES_BUCKETS,
+)
+SERIALIZER_SECONDS = Histogram(
+    'foodgram_request_serializer_seconds',
+    'Время сериализации ответа, включая ленивые запросы.',
+    VIEW_LABELS,
+    buckets=SECONDS_BUCKETS,
+)
+SPAN_SECONDS = Histogram(
+    'foodgram_span_seconds',
+    'Время именованных участков кода.',
+    ('name',),
+    buckets=SECONDS_BUCKETS,
+)
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Счётчики одного запроса: SQL-запросы и именованные участки.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.spans = defaultdict(float)
+        self.active = set()
+
+    def server_timing(self, total):
+        metrics = [f'db;dur={self.db * 1000:.1f};desc="{self.queries} sql"']
+        metrics.extend(
+            f'{name};dur={seconds * 1000:.1f}'
+            for name, seconds in self.spans.items()
+        )
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+def track_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.db += time.perf_counter() - start
+
+
+def install_query_tracker(sender, connection, **kwargs):
+    """
+    Подключает подсчёт запросов к каждому соединению: запросы
+    учитываются в том потоке, где выполняются, в том числе в пуле
+    потоков асинхронных представлений.
+    """
+    if track_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_query)
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    """
+    Замеряет участок кода. Вложенные участки с тем же именем
+    не учитываются повторно.
+    """
+    timings = _current.get()
+    if timings is not None and name in timings.active:
+        yield
+        return
+    if timings is not None:
+        timings.active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        SPAN_SECONDS.labels(name).observe(elapsed)
+        if timings is not None:
+            timings.active.discard(name)
+            timings.spans[name] += elapsed
+
+
+def observe_request(view, action, timings, total):
+    REQUEST_SECONDS.labels(view, action).observe(total)
+    DB_SECONDS.labels(view, action).observe(timings.db)
+    DB_QUERIES.labels(view, action).observe(timings.queries)
+    SERIALIZER_SECONDS.labels(view, action).observe(
+        timings.spans.get('serializer', 0.0)
+    )
+
+
+def instrument_serializers():
+    """
+    Оборачивает BaseSerializer.data в участок serializer:
+    в DRF это единая точка, где строится представление ответа.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    data = BaseSerializer.data
+    if getattr(data.fget, 'instrumented', False):
+        return
+
+    def timed_data(self):
+        with span('serializer'):
+            return data.fget(self)
+
+    timed_data.instrumented = True
+    BaseSerializer.data = property(timed_data)
+
+
+def render_metrics():
+    if os.environ.get(MULTIPROCESS_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from django.conf import settings
+
+from core.metrics import finish_request, observe_request, start_request
+
+
+def get_view_labels(view_func, request):
+    view = getattr(view_func, 'cls', None)
+    if view is None:
+        return f'{view_func.__module__}.{view_func.__name__}', ''
+    actions = getattr(view_func, 'actions', None) or {}
+    return view.__name__, actions.get(request.method.lower(), '')
+
+
+class RequestMetricsMiddleware:
+    """
+    Собирает время запроса, число и время SQL-запросов и время
+    сериализации по представлению и действию. При SERVER_TIMING
+    отдаёт их в заголовке Server-Timing.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings, token = start_request()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request(token)
+        return self.finish(request, response, timings, start)
+
+    async def __acall__(self, request):
+        timings, token = start_request()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request(token)
+        return self.finish(request, response, timings, start)
+
+    def finish(self, request, response, timings, start):
+        total = time.perf_counter() - start
+        view, action = getattr(
+            request, 'metrics_labels', ('unresolved', '')
+        )
+        observe_request(view, action, timings, total)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = timings.server_timing(total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_labels = get_view_labels(view_func, request)
@@ -0,0 +1,8 @@
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from core.metrics import render_metrics
+
+
+def metrics(request):
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
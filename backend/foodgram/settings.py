@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -33,6 +34,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -76,6 +78,25 @@ DATABASES = {
 }
 
 
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', default=os.path.join(tempfile.gettempdir(), 'foodgram_cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', default=2000)),
+        },
+    },
+    # Метки версий справочников хранятся отдельно: здесь всего несколько
+    # ключей, и вытеснение записей основного кэша их не затрагивает.
+    'versions': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('VERSIONS_CACHE_LOCATION', default=os.path.join(tempfile.gettempdir(), 'foodgram_versions')),
+    },
+}
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -116,7 +137,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -141,6 +162,8 @@ DJOSER = {
 
 USERNAME_FIELD = 'email'
 
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', default=5 * 60))
+
 ROLES = [
     ('user', 'user'),
     ('admin', 'admin'),
@@ -151,6 +174,23 @@ STATUS_CHOICES = [
     ('u', 'Unblock'),
 ]
 
+SERVER_TIMING = os.getenv('SERVER_TIMING', default='False') == 'True'
+
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', default='False') == 'True'
+ASGI_ORM_THREADS = int(os.getenv('ASGI_ORM_THREADS', default=8))
+
+PDF_CACHE_MAX_ENTRIES = 256
+PDF_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+IMAGE_RENDITION_WIDTHS = (320, 640, 1280)
+IMAGE_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 40 * 1000 * 1000
+IMAGE_UPLOAD_SPOOL_SIZE = 1024 * 1024
+
+FEED_LENGTH = 500
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+FEED_BATCH_SIZE = 1000
+
 CORS_URLS_REGEX = r'^/api/.*$'
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:5000',
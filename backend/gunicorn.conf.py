@@ -0,0 +1,51 @@
+import gc
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+
+def get_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = os.getenv('GUNICORN_BIND', default='0:8000')
+preload_app = True
+workers = int(os.getenv('GUNICORN_WORKERS', default=get_cores() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', default=2))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', default=1000))
+max_requests_jitter = int(
+    os.getenv('GUNICORN_MAX_REQUESTS_JITTER', default=max_requests // 10)
+)
+
+
+def on_starting(server):
+    """
+    Метрики прошлого запуска в общем каталоге больше не нужны.
+    """
+    path = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def when_ready(server):
+    """
+    Прогрев в мастер-процессе до fork: воркеры получают шрифт,
+    тэги и индекс ингредиентов через copy-on-write.
+    """
+    from api.warmup import warm_up
+
+    try:
+        warm_up()
+    except Exception:
+        server.log.exception('Прогрев не выполнен')
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,7 +1,9 @@
 from django.contrib import admin
 
+from core.admin_tools import LargeTableAdmin, autocomplete_filter
+
 from .models import (FavoriteRecipe, Ingredient, IngredientsInRecipes, Recipe,
-                     RecipesTags, Tag)
+                     RecipesTags, ShoppingListExport, Tag)
 
 
 @admin.register(Tag)
@@ -39,7 +41,7 @@ class IngredientAdmin(admin.ModelAdmin):
 
 
 @admin.register(IngredientsInRecipes)
-class IngredientInRecipeAdmin(admin.ModelAdmin):
+class IngredientInRecipeAdmin(LargeTableAdmin):
     autocomplete_fields = (
         'recipe',
         'ingredient',
@@ -49,43 +51,53 @@ class IngredientInRecipeAdmin(admin.ModelAdmin):
         'ingredient',
         'amount',
     )
+    list_select_related = (
+        'recipe',
+        'ingredient',
+    )
+    list_filter = (
+        autocomplete_filter('recipe', 'Рецепт'),
+        autocomplete_filter('ingredient', 'Ингредиент'),
+    )
     search_fields = (
-        'ingredient__name',
-        'recipe__name',
+        '^ingredient__name',
+        '^recipe__name',
     )
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(LargeTableAdmin):
     list_display = (
         'pk',
         'name',
         'author',
         'cooking_time',
         'favorites',
+        'in_carts_count',
     )
     list_display_links = (
         'pk',
         'name',
     )
+    list_select_related = ('author',)
     list_filter = (
-        'author',
-        'name',
+        autocomplete_filter('author', 'Автор'),
         'tags',
     )
     search_fields = (
-        'author',
         'name',
+        '=author__username',
     )
+    autocomplete_fields = ('author',)
     empty_value_display = '-пусто-'
 
-    @staticmethod
-    def favorites(obj):
-        return obj.favorite.filter(favorite=True).count()
+    @admin.display(description='В избранном', ordering='favorites_count')
+    def favorites(self, obj):
+        return obj.favorites_count
 
 
 @admin.register(FavoriteRecipe)
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(LargeTableAdmin):
     list_display = (
         'pk',
         'user',
@@ -93,15 +105,56 @@ class FavoriteAdmin(admin.ModelAdmin):
         'shopping_cart',
         'favorite',
     )
+    list_select_related = (
+        'user',
+        'recipe',
+    )
+    list_filter = (
+        autocomplete_filter('user', 'Пользователь'),
+        autocomplete_filter('recipe', 'Рецепт'),
+        'favorite',
+        'shopping_cart',
+    )
+    autocomplete_fields = (
+        'user',
+        'recipe',
+    )
 
 
 @admin.register(RecipesTags)
-class RecipesTags(admin.ModelAdmin):
+class RecipesTags(LargeTableAdmin):
     autocomplete_fields = (
         'recipe',
         'tag',
     )
+    list_select_related = (
+        'recipe',
+        'tag',
+    )
+    list_filter = ('tag',)
     search_fields = (
         'recipe__name',
         'tag__name',
     )
+
+
+@admin.register(ShoppingListExport)
+class ShoppingListExportAdmin(LargeTableAdmin):
+    list_display = (
+        'pk',
+        'user',
+        'status',
+        'created',
+        'render_time',
+        'size',
+    )
+    list_filter = ('status',)
+    list_select_related = ('user',)
+    readonly_fields = (
+        'context',
+        'render_time',
+        'size',
+        'error',
+        'claimed',
+        'finished',
+    )
@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def create_search_index(sender, using, **kwargs):
+    from recipes.search import ensure_sqlite_fts
+
+    ensure_sqlite_fts(using)
 
 
 class RecipesConfig(AppConfig):
     name = 'recipes'
+
+    def ready(self):
+        post_migrate.connect(create_search_index, sender=self)
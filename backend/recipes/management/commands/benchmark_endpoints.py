@@ -0,0 +1,313 @@
+import io
+import json
+import random
+import statistics
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (CaptureQueriesContext, override_settings,
+                               setup_test_environment,
+                               teardown_test_environment)
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import (FavoriteRecipe, Ingredient, IngredientsInRecipes,
+                            Recipe, RecipesTags, Tag)
+from users.models import Follow, User
+
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+    },
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-versions',
+    },
+}
+WORDS = (
+    'борщ', 'салат', 'пирог', 'суп', 'омлет', 'каша', 'рагу', 'паста',
+    'котлеты', 'блины', 'запеканка', 'плов', 'гуляш', 'соус', 'десерт',
+)
+QUERY_BUDGETS = {
+    'recipes_list': 5,
+    'recipes_list_cursor': 4,
+    'recipes_by_tag': 5,
+    'recipes_by_author': 5,
+    'recipes_favorited': 5,
+    'recipes_in_shopping_cart': 5,
+    'recipes_search': 5,
+    'recipe_detail': 4,
+    'subscriptions': 3,
+    'feed': 5,
+    'ingredients_search': 0,
+    'download_shopping_cart_pdf': 2,
+    'download_shopping_cart_csv': 2,
+    'favorite_toggle': 16,
+    'shopping_cart_toggle': 16,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'seed a throwaway test database and measure latency and '
+        'query counts of the main api endpoints'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', default=200, type=int)
+        parser.add_argument('--recipes', default=2000, type=int)
+        parser.add_argument('--tags', default=10, type=int)
+        parser.add_argument('--ingredients', default=2000, type=int)
+        parser.add_argument('--favorites-per-user', default=30, type=int)
+        parser.add_argument('--follows-per-user', default=10, type=int)
+        parser.add_argument('--repeat', default=20, type=int)
+        parser.add_argument('--seed', default=1, type=int)
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='write results to this JSON file',
+        )
+        parser.add_argument(
+            '--baseline',
+            default=None,
+            help='compare with results of an earlier run',
+        )
+        parser.add_argument(
+            '--tolerance',
+            default=1.5,
+            type=float,
+            help='allowed median latency growth against the baseline',
+        )
+        parser.add_argument(
+            '--slack-ms',
+            default=2.0,
+            type=float,
+            help='latency growth below this is treated as noise',
+        )
+
+    def seed(self, options):
+        rnd = random.Random(options['seed'])
+        password = make_password('benchmark')
+        users = User.objects.bulk_create(
+            User(
+                username=f'user{i}',
+                email=f'user{i}@example.com',
+                first_name='Имя',
+                last_name='Фамилия',
+                password=password,
+            )
+            for i in range(options['users'])
+        )
+        tags = Tag.objects.bulk_create(
+            Tag(name=f'Тэг {i}', slug=f'tag{i}', color='#%06X' % i)
+            for i in range(options['tags'])
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'{rnd.choice(WORDS)} {i}', measurement_unit='г')
+            for i in range(options['ingredients'])
+        )
+        if connection.vendor != 'postgresql':
+            users = list(User.objects.order_by('id'))
+            tags = list(Tag.objects.order_by('id'))
+            ingredients = list(Ingredient.objects.order_by('id'))
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=rnd.choice(users),
+                name=f'{rnd.choice(WORDS)} {rnd.choice(WORDS)} {i}',
+                text=' '.join(rnd.choices(WORDS, k=20)),
+                cooking_time=rnd.randint(5, 120),
+                image='recipes/images/benchmark.png',
+            )
+            for i in range(options['recipes'])
+        )
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+        RecipesTags.objects.bulk_create(
+            RecipesTags(recipe_id=recipe_id, tag=tag)
+            for recipe_id in recipe_ids
+            for tag in rnd.sample(tags, min(len(tags), rnd.randint(1, 3)))
+        )
+        IngredientsInRecipes.objects.bulk_create(
+            IngredientsInRecipes(
+                recipe_id=recipe_id,
+                ingredient=ingredient,
+                amount=rnd.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient in rnd.sample(ingredients, rnd.randint(3, 12))
+        )
+        FavoriteRecipe.objects.bulk_create(
+            FavoriteRecipe(
+                user=user,
+                recipe_id=recipe_id,
+                favorite=rnd.random() < 0.7,
+                shopping_cart=rnd.random() < 0.3,
+            )
+            for user in users
+            for recipe_id in rnd.sample(
+                recipe_ids,
+                min(len(recipe_ids), options['favorites_per_user']),
+            )
+        )
+        Follow.objects.bulk_create(
+            Follow(user=user, author=author)
+            for user in users
+            for author in rnd.sample(
+                users, min(len(users), options['follows_per_user'] + 1)
+            )
+            if author != user
+        )
+        call_command('recompute_counters', stdout=io.StringIO())
+        call_command('rebuild_feeds', stdout=io.StringIO())
+        return users[0], recipe_ids, tags, ingredients
+
+    def get_scenarios(self, user, recipe_ids, tags, ingredients):
+        tag = tags[0].slug
+        recipe_id = recipe_ids[len(recipe_ids) // 2]
+        toggled = Recipe.objects.exclude(favorite__user=user).first().id
+        ingredient = ingredients[0].name.split()[0][:3]
+        return {
+            'recipes_list': ('get', '/api/recipes/'),
+            'recipes_list_cursor': ('get', '/api/recipes/?cursor='),
+            'recipes_by_tag': ('get', f'/api/recipes/?tags={tag}'),
+            'recipes_by_author': ('get', f'/api/recipes/?author={user.id}'),
+            'recipes_favorited': ('get', '/api/recipes/?is_favorited=1'),
+            'recipes_in_shopping_cart': (
+                'get', '/api/recipes/?is_in_shopping_cart=1'
+            ),
+            'recipes_search': ('get', f'/api/recipes/?search={WORDS[0]}'),
+            'recipe_detail': ('get', f'/api/recipes/{recipe_id}/'),
+            'subscriptions': ('get', '/api/users/subscriptions/'),
+            'feed': ('get', '/api/recipes/feed/'),
+            'ingredients_search': (
+                'get', f'/api/ingredients/?name={ingredient}'
+            ),
+            'download_shopping_cart_pdf': (
+                'get', '/api/recipes/download_shopping_cart/'
+            ),
+            'download_shopping_cart_csv': (
+                'get', '/api/recipes/download_shopping_cart/?format=csv'
+            ),
+            'favorite_toggle': (
+                'toggle', f'/api/recipes/{toggled}/favorite/'
+            ),
+            'shopping_cart_toggle': (
+                'toggle', f'/api/recipes/{toggled}/shopping_cart/'
+            ),
+        }
+
+    def request(self, client, method, url):
+        if method == 'toggle':
+            response = client.post(url)
+            if response.status_code < 400:
+                response = client.delete(url)
+        else:
+            response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def measure(self, client, method, url, repeat):
+        with CaptureQueriesContext(connection) as cold:
+            response = self.request(client, method, url)
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as warm:
+                start = time.perf_counter()
+                response = self.request(client, method, url)
+                timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return {
+            'status': response.status_code,
+            'cold_queries': len(cold),
+            'queries': len(warm),
+            'min_ms': round(timings[0], 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 3),
+        }
+
+    def run(self, options):
+        start = time.perf_counter()
+        user, recipe_ids, tags, ingredients = self.seed(options)
+        seed_time = time.perf_counter() - start
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}'
+        )
+        endpoints = {}
+        scenarios = self.get_scenarios(user, recipe_ids, tags, ingredients)
+        for name, (method, url) in scenarios.items():
+            endpoints[name] = self.measure(
+                client, method, url, options['repeat']
+            )
+            self.stdout.write(
+                '{:<28} {status} {queries:>3} q {median_ms:>9.2f} ms '
+                '(p95 {p95_ms:.2f})'.format(name, **endpoints[name])
+            )
+        return {
+            'database': connection.vendor,
+            'dataset': {
+                key: options[key] for key in (
+                    'users', 'recipes', 'tags', 'ingredients',
+                    'favorites_per_user', 'follows_per_user', 'seed',
+                )
+            },
+            'seed_seconds': round(seed_time, 2),
+            'repeat': options['repeat'],
+            'endpoints': endpoints,
+        }
+
+    def check_results(self, results, baseline, tolerance, slack_ms):
+        errors = []
+        for name, result in results['endpoints'].items():
+            if result['status'] >= 400:
+                errors.append(f'{name}: status {result["status"]}')
+            budget = QUERY_BUDGETS.get(name)
+            if budget is not None and result['queries'] > budget:
+                errors.append(
+                    f'{name}: {result["queries"]} queries, budget {budget}'
+                )
+            previous = (baseline or {}).get('endpoints', {}).get(name)
+            if previous is None:
+                continue
+            if result['queries'] > previous['queries']:
+                errors.append(
+                    f'{name}: {result["queries"]} queries, '
+                    f'baseline {previous["queries"]}'
+                )
+            if result['median_ms'] > max(
+                previous['median_ms'] * tolerance,
+                previous['median_ms'] + slack_ms,
+            ):
+                errors.append(
+                    f'{name}: median {result["median_ms"]:.2f} ms, '
+                    f'baseline {previous["median_ms"]:.2f} ms'
+                )
+        return errors
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES, DEBUG=False):
+                results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+        errors = self.check_results(
+            results, baseline, options['tolerance'], options['slack_ms']
+        )
+        if errors:
+            raise CommandError(
+                'Превышены бюджеты производительности:\n' + '\n'.join(errors)
+            )
@@ -0,0 +1,56 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api.ingredient_index import IngredientIndex
+from api.serializers import IngredientSerialize
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = 'benchmark ingredient search: ORM icontains against in-memory index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', default=200, type=int)
+        parser.add_argument('--limit', default=None, type=int)
+        parser.add_argument('--seed', default=1, type=int)
+
+    def orm_search(self, query, limit):
+        queryset = Ingredient.objects.filter(name__icontains=query)
+        if limit is not None:
+            queryset = queryset[:limit]
+        return JSONRenderer().render(
+            IngredientSerialize(queryset, many=True).data
+        )
+
+    def measure(self, search, queries, limit):
+        start = time.perf_counter()
+        for query in queries:
+            search(query, limit)
+        return (time.perf_counter() - start) / len(queries) * 1000
+
+    def handle(self, *args, **options):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            raise CommandError('Справочник ингредиентов пуст.')
+        rnd = random.Random(options['seed'])
+        queries = []
+        for _ in range(options['queries']):
+            name = rnd.choice(names).lower()
+            start = rnd.randrange(len(name))
+            queries.append(name[start:start + rnd.randint(1, 5)])
+
+        start = time.perf_counter()
+        index = IngredientIndex.from_db()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        orm_ms = self.measure(self.orm_search, queries, options['limit'])
+        index_ms = self.measure(index.search_json, queries, options['limit'])
+        self.stdout.write(
+            f'ingredients: {len(names)}, queries: {len(queries)}\n'
+            f'index build: {build_ms:.1f} ms\n'
+            f'orm:   {orm_ms:.3f} ms/query\n'
+            f'index: {index_ms:.3f} ms/query ({orm_ms / index_ms:.0f}x)'
+        )
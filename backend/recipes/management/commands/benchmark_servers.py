@@ -0,0 +1,232 @@
+import csv
+import http.client
+import io
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from recipes.models import FavoriteRecipe, Ingredient, Recipe
+
+SERVERS = {
+    'wsgi': (
+        'gunicorn foodgram.wsgi:application --bind {host}:{port} '
+        '--workers {workers} --threads {threads}'
+    ),
+    'asgi': (
+        'gunicorn foodgram.asgi:application --bind {host}:{port} '
+        '--workers {workers} --worker-class uvicorn.workers.UvicornWorker'
+    ),
+}
+STARTUP_TIMEOUT = 30
+EXPORT_PATH = '/api/recipes/download_shopping_cart/?format={}'
+EXPORT_ROWS = {
+    'txt': lambda text: len(text.splitlines()) - 3,
+    'csv': lambda text: len(list(csv.reader(io.StringIO(text)))) - 1,
+    'json': lambda text: len(json.loads(text)),
+}
+
+
+def percentile(timings, share):
+    return timings[min(len(timings) - 1, int(len(timings) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        'start the wsgi and asgi deployments on the current database '
+        'and compare throughput of the public read endpoints, '
+        'checking the streamed shopping list export on each'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--server',
+            action='append',
+            choices=SERVERS,
+            help='servers to compare, both by default',
+        )
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', default=8765, type=int)
+        parser.add_argument('--workers', default=1, type=int)
+        parser.add_argument(
+            '--threads',
+            default=1,
+            type=int,
+            help='threads per wsgi worker',
+        )
+        parser.add_argument('--concurrency', default=32, type=int)
+        parser.add_argument(
+            '--duration',
+            default=10.0,
+            type=float,
+            help='seconds of load per server',
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='write results to this JSON file',
+        )
+
+    def get_paths(self):
+        recipe = Recipe.objects.order_by('-pub_date').values('id').first()
+        ingredient = Ingredient.objects.values('name').first()
+        if recipe is None or ingredient is None:
+            raise CommandError(
+                'Нет данных для нагрузки, выполните seed_foodgram.'
+            )
+        return [
+            '/api/tags/',
+            f'/api/ingredients/?name={quote(ingredient["name"][:2])}',
+            '/api/recipes/',
+            f'/api/recipes/{recipe["id"]}/',
+        ]
+
+    def get_export(self):
+        """
+        Пользователь со списком покупок, его токен и число строк,
+        которое должна вернуть выгрузка.
+        """
+        user_id = FavoriteRecipe.objects.filter(
+            shopping_cart=True
+        ).values_list('user_id', flat=True).first()
+        if user_id is None:
+            raise CommandError(
+                'Нет списков покупок для проверки, выполните seed_foodgram.'
+            )
+        token, _ = Token.objects.get_or_create(user_id=user_id)
+        rows = Ingredient.objects.filter(
+            ingredient_in_recipe__recipe__favorite__user=user_id,
+            ingredient_in_recipe__recipe__favorite__shopping_cart=True,
+        ).values('name', 'measurement_unit').distinct().count()
+        return {'Authorization': f'Token {token.key}'}, rows
+
+    def check_export(self, name, options, export):
+        headers, expected = export
+        for file_format, count_rows in EXPORT_ROWS.items():
+            path = EXPORT_PATH.format(file_format)
+            try:
+                status, body = self.request(
+                    options['host'], options['port'], path, headers
+                )
+                rows = count_rows(body.decode())
+            except (OSError, http.client.HTTPException, ValueError) as error:
+                raise CommandError(f'Сервер {name}, {path}: {error!r}')
+            if status != 200 or rows != expected:
+                raise CommandError(
+                    f'Сервер {name}, {path}: статус {status}, '
+                    f'строк {rows} из {expected}.'
+                )
+
+    def start_server(self, name, options):
+        command = SERVERS[name].format(**options)
+        process = subprocess.Popen(
+            shlex.split(command),
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'Сервер {name} не запустился: {command}')
+            try:
+                self.fetch(options['host'], options['port'], '/api/tags/')
+                return process
+            except OSError:
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError(f'Сервер {name} не ответил за {STARTUP_TIMEOUT} с.')
+
+    def request(self, host, port, path, headers=None):
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        try:
+            connection.request('GET', path, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def fetch(self, host, port, path):
+        return self.request(host, port, path)[0]
+
+    def load(self, options, paths):
+        deadline = time.monotonic() + options['duration']
+        timings, errors = [], []
+        lock = threading.Lock()
+
+        def client(number):
+            position = number
+            while time.monotonic() < deadline:
+                path = paths[position % len(paths)]
+                position += 1
+                start = time.perf_counter()
+                try:
+                    status = self.fetch(options['host'], options['port'], path)
+                except OSError as error:
+                    status = type(error).__name__
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    if status == 200:
+                        timings.append(elapsed)
+                    else:
+                        errors.append(f'{path}: {status}')
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(client, range(options['concurrency'])))
+        return timings, errors, time.perf_counter() - start
+
+    def benchmark(self, name, options, paths, export):
+        process = self.start_server(name, options)
+        try:
+            self.check_export(name, options, export)
+            for path in paths:
+                self.fetch(options['host'], options['port'], path)
+            timings, errors, elapsed = self.load(options, paths)
+        finally:
+            process.terminate()
+            process.wait()
+        if not timings:
+            raise CommandError(
+                f'Сервер {name} не обработал ни одного запроса.'
+            )
+        timings.sort()
+        return {
+            'requests': len(timings),
+            'errors': len(errors),
+            'rps': round(len(timings) / elapsed, 1),
+            'median_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'p99_ms': round(percentile(timings, 0.99), 2),
+        }
+
+    def handle(self, *args, **options):
+        paths = self.get_paths()
+        export = self.get_export()
+        results = {}
+        for name in options['server'] or list(SERVERS):
+            results[name] = self.benchmark(name, options, paths, export)
+            self.stdout.write(
+                '{:<5} {rps:>8.1f} req/s {median_ms:>8.2f} ms '
+                '(p95 {p95_ms:.2f}, p99 {p99_ms:.2f}) '
+                'ошибок: {errors}'.format(name, **results[name])
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({
+                    'paths': paths,
+                    'concurrency': options['concurrency'],
+                    'workers': options['workers'],
+                    'duration': options['duration'],
+                    'servers': results,
+                }, file, ensure_ascii=False, indent=2)
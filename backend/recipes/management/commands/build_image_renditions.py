@@ -0,0 +1,95 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from recipes.models import Recipe
+from utils.image_renditions import build_renditions, delete_renditions
+
+
+def render(job):
+    recipe_id, name = job
+    return recipe_id, name, build_renditions(name)
+
+
+class Command(BaseCommand):
+    help = 'build resized recipe image renditions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', default=2, type=int)
+        parser.add_argument('--batch-size', default=50, type=int)
+        parser.add_argument('--interval', default=1.0, type=float)
+        parser.add_argument(
+            '--stale-timeout',
+            default=300,
+            type=float,
+            help='seconds after which a claimed or failed image is retried',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='rebuild renditions for every recipe',
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='keep polling for new images instead of exiting',
+        )
+
+    def requeue_stale_jobs(self, timeout):
+        """
+        Возвращает в очередь картинки, которые были взяты в работу и не
+        обработаны: упавшие при обработке или оставшиеся от остановленного
+        процесса.
+        """
+        requeued = Recipe.objects.filter(
+            renditions_claimed__lt=timezone.now() - timedelta(seconds=timeout)
+        ).update(image_renditions=None, renditions_claimed=None)
+        if requeued:
+            self.stderr.write(f'requeued stale images: {requeued}')
+
+    def claim_jobs(self, limit):
+        pending = Recipe.objects.filter(
+            image_renditions__isnull=True
+        ).order_by('id').values_list('id', 'image')[:limit]
+        claimed = []
+        for recipe_id, name in pending:
+            if Recipe.objects.filter(
+                id=recipe_id, image_renditions__isnull=True
+            ).update(image_renditions={}, renditions_claimed=timezone.now()):
+                claimed.append((recipe_id, name))
+        return claimed
+
+    def finish_job(self, recipe_id, name, renditions):
+        if not Recipe.objects.filter(id=recipe_id, image=name).update(
+            image_renditions=renditions, renditions_claimed=None
+        ):
+            delete_renditions(renditions)
+
+    def handle(self, *args, **options):
+        if options['force']:
+            Recipe.objects.update(
+                image_renditions=None, renditions_claimed=None
+            )
+        done = 0
+        with ProcessPoolExecutor(max_workers=options['processes']) as pool:
+            while True:
+                close_old_connections()
+                self.requeue_stale_jobs(options['stale_timeout'])
+                jobs = self.claim_jobs(options['batch_size'])
+                futures = [(job, pool.submit(render, job)) for job in jobs]
+                for (recipe_id, name), future in futures:
+                    try:
+                        self.finish_job(*future.result())
+                    except Exception as error:
+                        self.stderr.write(f'recipe {recipe_id}: {error!r}')
+                        continue
+                    done += 1
+                if not jobs:
+                    if not options['watch']:
+                        break
+                    time.sleep(options['interval'])
+        self.stdout.write(f'renditions built for {done} recipes')
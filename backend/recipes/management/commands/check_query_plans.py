@@ -0,0 +1,134 @@
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from recipes.models import FavoriteRecipe, FeedEntry, Ingredient, RecipesTags
+from users.models import Follow
+
+SQLITE_INDEX = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+
+
+def unique_index(model, name):
+    """
+    Имена индекса уникального ограничения: в SQLite он создаётся
+    вместе с таблицей и получает служебное имя.
+    """
+    return (name, f'sqlite_autoindex_{model._meta.db_table}_')
+
+
+def get_checks():
+    return {
+        'favorites_of_user': (
+            FavoriteRecipe.objects.filter(
+                user_id=1, favorite=True
+            ).order_by().values('recipe_id'),
+            ('favorite_user_recipe_idx',),
+        ),
+        'shopping_cart_of_user': (
+            FavoriteRecipe.objects.filter(
+                user_id=1, shopping_cart=True
+            ).order_by().values('recipe_id'),
+            ('cart_user_recipe_idx',),
+        ),
+        'shopping_cart_totals': (
+            Ingredient.objects.filter(
+                ingredient_in_recipe__recipe__favorite__user=1,
+                ingredient_in_recipe__recipe__favorite__shopping_cart=True,
+            ).values_list('name', 'measurement_unit').annotate(
+                total=Sum('ingredient_in_recipe__amount')
+            ).order_by('name'),
+            ('cart_user_recipe_idx',),
+        ),
+        'recipes_by_tags': (
+            RecipesTags.objects.filter(
+                tag_id__in=[1, 2]
+            ).order_by().values('recipe_id'),
+            ('recipestags_tag_recipe_idx',),
+        ),
+        'tags_of_recipe': (
+            RecipesTags.objects.filter(recipe_id=1).order_by(),
+            unique_index(RecipesTags, 'unique_recipe_tag'),
+        ),
+        'feed_of_user': (
+            FeedEntry.objects.filter(user_id=1).values('recipe_id'),
+            (
+                'feed_user_pub_date_idx',
+                *unique_index(FeedEntry, 'unique_feed_entry'),
+            ),
+        ),
+        'followers_of_author': (
+            Follow.objects.filter(author_id=1).values('user_id'),
+            ('follow_author_user_idx',),
+        ),
+        'is_subscribed': (
+            Follow.objects.filter(user_id=1, author_id=2),
+            (
+                *unique_index(Follow, 'unique_following'),
+                'follow_author_user_idx',
+            ),
+        ),
+    }
+
+
+def walk_plan(node):
+    if 'Index Name' in node:
+        yield node['Index Name']
+    for child in node.get('Plans', ()):
+        yield from walk_plan(child)
+
+
+def explain_json(queryset):
+    """
+    План PostgreSQL в JSON: QuerySet.explain() в Django 3.2 склеивает
+    уже разобранный драйвером JSON в строку через str().
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        return json.loads(plan)
+    return plan
+
+
+def used_indexes(queryset):
+    if connection.vendor == 'postgresql':
+        plan = explain_json(queryset)
+        return list(walk_plan(plan[0]['Plan']))
+    return SQLITE_INDEX.findall(queryset.explain())
+
+
+class Command(BaseCommand):
+    help = 'run EXPLAIN for the main queries and check index usage'
+
+    def get_used_indexes(self, queryset):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            return used_indexes(queryset)
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(
+                f'План запроса не разбирается для {connection.vendor}.'
+            )
+        failed = []
+        for name, (queryset, expected) in get_checks().items():
+            used = self.get_used_indexes(queryset)
+            ok = any(
+                index.startswith(prefix)
+                for index in used for prefix in expected
+            )
+            self.stdout.write(
+                f'{"ok" if ok else "FAIL":<5}{name}: {", ".join(used) or "-"}'
+            )
+            if not ok:
+                failed.append(f'{name}: ожидался {expected[0]}')
+        if failed:
+            raise CommandError(
+                'Запросы не используют индексы:\n' + '\n'.join(failed)
+            )
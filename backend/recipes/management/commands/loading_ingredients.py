@@ -1,16 +1,52 @@
+import csv
 import json
 import os
+import time
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
+from api.versions import INGREDIENTS_VERSION_KEY, bump_version
 from recipes.models import Ingredient
 
 DATA_ROOT = os.path.join(settings.BASE_DIR, 'data/')
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_json(file, chunk_size=CHUNK_SIZE):
+    """
+    Читает JSON-массив объектов по частям, не загружая файл целиком.
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидается JSON-массив.')
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise CommandError('Некорректный JSON.')
+            buffer += chunk
+            continue
+        yield item['name'], item['measurement_unit']
+        buffer = buffer[end:]
+
+
+def iter_csv(file):
+    for row in csv.reader(file):
+        if row:
+            yield row[0], row[1]
 
 
 class Command(BaseCommand):
-    help = 'loading ingredients in JSON file'
+    help = 'loading ingredients in JSON or CSV file'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -19,19 +55,84 @@ class Command(BaseCommand):
             nargs='?',
             type=str
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='insert new ingredients with bulk_create in batches',
+        )
+        parser.add_argument('--batch-size', default=1000, type=int)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='count new ingredients without writing them',
+        )
+
+    def iter_rows(self, file, filename):
+        if filename.endswith('.csv'):
+            rows = iter_csv(file)
+        else:
+            rows = iter_json(file)
+        for name, measurement_unit in rows:
+            yield name.strip(), measurement_unit.strip()
+
+    def load_one_by_one(self, rows):
+        for name, measurement_unit in rows:
+            Ingredient.objects.update_or_create(
+                name=name,
+                measurement_unit=measurement_unit,
+            )
+
+    def load_bulk(self, rows, batch_size, dry_run):
+        start = time.perf_counter()
+        seen = set(
+            Ingredient.objects.values_list('name', 'measurement_unit')
+        )
+        inserted = skipped = 0
+        batch = []
+        with transaction.atomic():
+            for row in rows:
+                if row in seen:
+                    skipped += 1
+                    continue
+                seen.add(row)
+                inserted += 1
+                if dry_run:
+                    continue
+                batch.append(
+                    Ingredient(name=row[0], measurement_unit=row[1])
+                )
+                if len(batch) >= batch_size:
+                    Ingredient.objects.bulk_create(
+                        batch, ignore_conflicts=True
+                    )
+                    batch = []
+            if batch:
+                Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+        if inserted and not dry_run:
+            bump_version(INGREDIENTS_VERSION_KEY)
+        self.stdout.write(
+            '%s: %d, пропущено: %d, время: %.2f с' % (
+                'будет добавлено' if dry_run else 'добавлено',
+                inserted,
+                skipped,
+                time.perf_counter() - start,
+            )
+        )
 
     def handle(self, *args, **options):
+        filename = options['filename']
         try:
             with open(
-                os.path.join(DATA_ROOT, options['filename']),
+                os.path.join(DATA_ROOT, filename),
                 'r',
                 encoding='utf-8',
             ) as f:
-                data = json.load(f)
-                for ingredient in data:
-                    Ingredient.objects.update_or_create(
-                        name=ingredient['name'],
-                        measurement_unit=ingredient['measurement_unit'],
+                rows = self.iter_rows(f, filename)
+                if options['bulk'] or options['dry_run']:
+                    self.load_bulk(
+                        rows, options['batch_size'], options['dry_run']
                     )
+                else:
+                    self.load_one_by_one(rows)
         except FileNotFoundError:
             raise CommandError('Файл не найден.')
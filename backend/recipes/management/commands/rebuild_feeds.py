@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.feed import rebuild_timeline
+from recipes.models import FeedEntry
+from users.models import Follow
+
+
+class Command(BaseCommand):
+    help = 'rebuild subscription feed timelines from follows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            type=int,
+            help='rebuild only these users, all by default',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        user_ids = options['user']
+        if user_ids is None:
+            FeedEntry.objects.all().delete()
+            user_ids = Follow.objects.order_by('user_id').values_list(
+                'user_id', flat=True
+            ).distinct()
+        rebuilt = 0
+        for user_id in list(user_ids):
+            with transaction.atomic():
+                rebuild_timeline(user_id)
+            rebuilt += 1
+        self.stdout.write(
+            'лент: %d, записей: %d, время: %.1f с' % (
+                rebuilt,
+                FeedEntry.objects.count(),
+                time.perf_counter() - start,
+            )
+        )
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from core.counters import count_subquery
+from recipes.models import FavoriteRecipe, Recipe
+from users.models import Follow, User
+
+
+class Command(BaseCommand):
+    help = 'recompute favorite, cart, recipe and follower counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            default=10000,
+            type=int,
+            help='rows per UPDATE, by primary key range',
+        )
+
+    def update_in_batches(self, model, batch_size, **values):
+        last_id = model.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+        updated = 0
+        for start in range(0, last_id, batch_size):
+            with transaction.atomic():
+                updated += model.objects.filter(
+                    pk__gt=start, pk__lte=start + batch_size
+                ).update(**values)
+        return updated
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        batch_size = options['batch_size']
+        recipes = self.update_in_batches(
+            Recipe,
+            batch_size,
+            favorites_count=count_subquery(
+                FavoriteRecipe, 'recipe', favorite=True
+            ),
+            in_carts_count=count_subquery(
+                FavoriteRecipe, 'recipe', shopping_cart=True
+            ),
+        )
+        users = self.update_in_batches(
+            User,
+            batch_size,
+            recipes_count=count_subquery(Recipe, 'author'),
+            followers_count=count_subquery(Follow, 'author'),
+        )
+        self.stdout.write(
+            'рецептов: %d, пользователей: %d, время: %.2f с' % (
+                recipes, users, time.perf_counter() - start
+            )
+        )
@@ -0,0 +1,263 @@
+import io
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from PIL import Image
+
+from api.versions import TAGS_VERSION_KEY, bump_version
+from recipes.models import (FavoriteRecipe, Ingredient, IngredientsInRecipes,
+                            Recipe, RecipesTags, Tag)
+from users.models import Follow, User
+
+SEED_IMAGE = 'recipes/images/seed.png'
+TAGS = (
+    ('Завтрак', 'breakfast', '#E26C2D'),
+    ('Обед', 'lunch', '#49B64E'),
+    ('Ужин', 'dinner', '#8775D2'),
+    ('Десерт', 'dessert', '#F2C94C'),
+    ('Выпечка', 'bakery', '#BB6BD9'),
+    ('Суп', 'soup', '#2D9CDB'),
+    ('Салат', 'salad', '#27AE60'),
+    ('Вегетарианское', 'vegetarian', '#6FCF97'),
+)
+WORDS = (
+    'домашний', 'быстрый', 'пряный', 'сливочный', 'запечённый',
+    'бабушкин', 'летний', 'острый', 'нежный', 'праздничный',
+)
+DISHES = (
+    'борщ', 'салат', 'пирог', 'суп', 'омлет', 'плов', 'рагу', 'паста',
+    'запеканка', 'гуляш', 'блины', 'котлеты', 'ризотто', 'кекс', 'соус',
+)
+TAG_COUNT_WEIGHTS = (50, 35, 15)
+
+
+def zipf_index(rnd, size):
+    """
+    Индекс от 0 до size - 1 с вероятностью примерно 1 / (индекс + 1):
+    немногие популярные объекты получают большую часть выборок.
+    """
+    return min(size - 1, int(size ** rnd.random()) - 1)
+
+
+def ingredient_count(rnd):
+    return max(2, min(25, round(rnd.lognormvariate(2.0, 0.4))))
+
+
+def bulk_insert(model, objects, batch_size):
+    with transaction.atomic():
+        model.objects.bulk_create(objects, batch_size=batch_size)
+
+
+def seed_recipes(task):
+    """
+    Рецепты с id из [first_id, first_id + count) вместе с тэгами
+    и ингредиентами. Выполняется в отдельном процессе.
+    """
+    first_id, count, options = task
+    rnd = random.Random(f'{options["seed"]}-recipes-{first_id}')
+    recipes, tags, ingredients = [], [], []
+    for recipe_id in range(first_id, first_id + count):
+        author = options['user_ids'][
+            zipf_index(rnd, len(options['user_ids']))
+        ]
+        recipes.append(Recipe(
+            id=recipe_id,
+            author_id=author,
+            name=(
+                f'{rnd.choice(WORDS).capitalize()} {rnd.choice(DISHES)} '
+                f'№{recipe_id}'
+            ),
+            text=' '.join(rnd.choices(WORDS + DISHES, k=30)),
+            cooking_time=rnd.randint(5, 180),
+            image=SEED_IMAGE,
+            image_renditions={},
+        ))
+        tag_count = rnd.choices((1, 2, 3), TAG_COUNT_WEIGHTS)[0]
+        tags.extend(
+            RecipesTags(recipe_id=recipe_id, tag_id=tag_id)
+            for tag_id in rnd.sample(options['tag_ids'], tag_count)
+        )
+        ingredients.extend(
+            IngredientsInRecipes(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=rnd.randint(1, 50) * 10,
+            )
+            for ingredient_id in rnd.sample(
+                options['ingredient_ids'], ingredient_count(rnd)
+            )
+        )
+    bulk_insert(Recipe, recipes, options['batch_size'])
+    bulk_insert(RecipesTags, tags, options['batch_size'])
+    bulk_insert(IngredientsInRecipes, ingredients, options['batch_size'])
+    return count
+
+
+def seed_lists(task):
+    """
+    Избранное, корзины и подписки пользователей из среза user_ids.
+    Популярность рецептов и авторов подчиняется степенному закону.
+    """
+    start, stop, options = task
+    rnd = random.Random(f'{options["seed"]}-lists-{start}')
+    user_ids = options['user_ids']
+    first_recipe, recipes = options['first_recipe_id'], options['recipes']
+    favorites, follows = [], []
+    for user_id in user_ids[start:stop]:
+        recipe_ids = {
+            first_recipe + zipf_index(rnd, recipes)
+            for _ in range(int(rnd.expovariate(1 / options['favorites'])))
+        }
+        for recipe_id in recipe_ids:
+            favorite = rnd.random() < 0.8
+            favorites.append(FavoriteRecipe(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                favorite=favorite,
+                shopping_cart=not favorite or rnd.random() < 0.2,
+            ))
+        author_ids = {
+            user_ids[zipf_index(rnd, len(user_ids))]
+            for _ in range(int(rnd.expovariate(1 / options['follows'])))
+        }
+        author_ids.discard(user_id)
+        follows.extend(
+            Follow(user_id=user_id, author_id=author_id)
+            for author_id in author_ids
+        )
+    bulk_insert(FavoriteRecipe, favorites, options['batch_size'])
+    bulk_insert(Follow, follows, options['batch_size'])
+    return len(favorites) + len(follows)
+
+
+class Command(BaseCommand):
+    help = (
+        'generate users, recipes, favorites, carts and follows '
+        'for load testing'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', default=1000, type=int)
+        parser.add_argument('--recipes', default=10000, type=int)
+        parser.add_argument(
+            '--favorites',
+            default=20,
+            type=float,
+            help='mean favorites and cart entries per user',
+        )
+        parser.add_argument(
+            '--follows',
+            default=5,
+            type=float,
+            help='mean followed authors per user',
+        )
+        parser.add_argument('--batch-size', default=5000, type=int)
+        parser.add_argument(
+            '--chunk-size',
+            default=20000,
+            type=int,
+            help='recipes or users per worker task',
+        )
+        parser.add_argument('--processes', default=1, type=int)
+        parser.add_argument('--seed', default=1, type=int)
+        parser.add_argument('--password', default='foodgram-seed')
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def ensure_catalog(self):
+        if not Ingredient.objects.exists():
+            call_command('loading_ingredients', bulk=True, stdout=self.stdout)
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, slug=slug, color=color)
+                for name, slug, color in TAGS
+            )
+            bump_version(TAGS_VERSION_KEY)
+        if not default_storage.exists(SEED_IMAGE):
+            buffer = io.BytesIO()
+            Image.new('RGB', (640, 480), '#F2C94C').save(buffer, 'PNG')
+            default_storage.save(SEED_IMAGE, ContentFile(buffer.getvalue()))
+
+    def seed_users(self, options):
+        first_id = self.next_id(User)
+        password = make_password(options['password'])
+        users = (
+            User(
+                id=user_id,
+                username=f'seed{user_id}',
+                email=f'seed{user_id}@example.com',
+                first_name='Пользователь',
+                last_name=f'№{user_id}',
+                password=password,
+            )
+            for user_id in range(first_id, first_id + options['users'])
+        )
+        bulk_insert(User, users, options['batch_size'])
+        return range(first_id, first_id + options['users'])
+
+    def run_tasks(self, function, tasks, processes):
+        if processes == 1:
+            return sum(map(function, tasks))
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            return sum(pool.map(function, tasks))
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['recipes'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь и рецепт.')
+        processes = options['processes']
+        if processes > 1 and connection.vendor == 'sqlite':
+            self.stderr.write('sqlite: записи выполняются в одном процессе')
+            processes = 1
+        start = time.perf_counter()
+        self.ensure_catalog()
+        user_ids = self.seed_users(options)
+        shared = {
+            'seed': options['seed'],
+            'batch_size': options['batch_size'],
+            'user_ids': user_ids,
+            'tag_ids': list(Tag.objects.values_list('id', flat=True)),
+            'ingredient_ids': list(
+                Ingredient.objects.values_list('id', flat=True)
+            ),
+            'first_recipe_id': self.next_id(Recipe),
+            'recipes': options['recipes'],
+            'favorites': options['favorites'],
+            'follows': options['follows'],
+        }
+        chunk = options['chunk_size']
+        recipes = self.run_tasks(seed_recipes, [
+            (
+                shared['first_recipe_id'] + offset,
+                min(chunk, options['recipes'] - offset),
+                shared,
+            )
+            for offset in range(0, options['recipes'], chunk)
+        ], processes)
+        rows = self.run_tasks(seed_lists, [
+            (offset, offset + chunk, shared)
+            for offset in range(0, len(user_ids), chunk)
+        ], processes)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [User, Recipe]
+            ):
+                cursor.execute(sql)
+        call_command('recompute_counters', stdout=io.StringIO())
+        call_command('rebuild_feeds', stdout=io.StringIO())
+        self.stdout.write(
+            'пользователей: %d, рецептов: %d, избранного и подписок: %d, '
+            'время: %.1f с' % (
+                len(user_ids), recipes, rows, time.perf_counter() - start
+            )
+        )
@@ -0,0 +1,103 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from recipes.models import ShoppingListExport
+from utils.create_pdf_file import render_pdf
+
+
+def timed_render(context):
+    start = time.perf_counter()
+    content = render_pdf(context)
+    return content, (time.perf_counter() - start) * 1000
+
+
+class Command(BaseCommand):
+    help = 'render queued shopping list exports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', default=2, type=int)
+        parser.add_argument('--interval', default=1.0, type=float)
+        parser.add_argument(
+            '--stale-timeout',
+            default=300,
+            type=float,
+            help='seconds after which a running job is queued again',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='process the current queue and exit',
+        )
+
+    def requeue_stale_jobs(self, timeout):
+        """
+        Возвращает в очередь задачи, которые воркер взял и не завершил:
+        например, если процесс был остановлен во время формирования.
+        """
+        requeued = ShoppingListExport.objects.filter(
+            status=ShoppingListExport.RUNNING,
+            claimed__lt=timezone.now() - timedelta(seconds=timeout),
+        ).update(status=ShoppingListExport.PENDING, claimed=None)
+        if requeued:
+            self.stderr.write(f'requeued stale jobs: {requeued}')
+
+    def claim_jobs(self, limit):
+        pending = ShoppingListExport.objects.filter(
+            status=ShoppingListExport.PENDING
+        ).order_by('created').values_list('id', flat=True)[:limit]
+        claimed = []
+        for job_id in pending:
+            if ShoppingListExport.objects.filter(
+                id=job_id, status=ShoppingListExport.PENDING
+            ).update(
+                status=ShoppingListExport.RUNNING, claimed=timezone.now()
+            ):
+                claimed.append(job_id)
+        return ShoppingListExport.objects.filter(id__in=claimed)
+
+    def finish_job(self, job, future):
+        job.finished = timezone.now()
+        try:
+            content, render_time = future.result()
+        except Exception as error:
+            job.status = ShoppingListExport.FAILED
+            job.error = repr(error)
+            job.save(update_fields=('status', 'error', 'finished'))
+            self.stderr.write(f'job {job.id} failed: {error!r}')
+            return
+        job.file.save(
+            job.context['file_name'], ContentFile(content), save=False
+        )
+        job.status = ShoppingListExport.DONE
+        job.render_time = render_time
+        job.size = len(content)
+        job.save(update_fields=(
+            'status', 'file', 'render_time', 'size', 'finished'
+        ))
+        self.stdout.write(
+            f'job {job.id}: {job.size} bytes in {render_time:.1f} ms'
+        )
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            while True:
+                close_old_connections()
+                self.requeue_stale_jobs(options['stale_timeout'])
+                jobs = list(self.claim_jobs(processes * 2))
+                futures = [
+                    (job, pool.submit(timed_render, job.context))
+                    for job in jobs
+                ]
+                for job, future in futures:
+                    self.finish_job(job, future)
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
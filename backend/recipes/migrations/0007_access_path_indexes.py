@@ -0,0 +1,55 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def delete_duplicate_tags(apps, schema_editor):
+    RecipesTags = apps.get_model('recipes', 'RecipesTags')
+    keep = RecipesTags.objects.values('recipe', 'tag').annotate(
+        keep_id=Min('id')
+    ).values('keep_id')
+    RecipesTags.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0006_recipe_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='favoriterecipe',
+            index=models.Index(condition=models.Q(('favorite', True)), fields=['user', 'recipe'], name='favorite_user_recipe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='favoriterecipe',
+            index=models.Index(condition=models.Q(('shopping_cart', True)), fields=['user', 'recipe'], name='cart_user_recipe_idx'),
+        ),
+        migrations.RunPython(delete_duplicate_tags, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='recipestags',
+            constraint=models.UniqueConstraint(fields=('recipe', 'tag'), name='unique_recipe_tag'),
+        ),
+        migrations.AddIndex(
+            model_name='recipestags',
+            index=models.Index(fields=['tag', 'recipe'], name='recipestags_tag_recipe_idx'),
+        ),
+        migrations.AlterField(
+            model_name='favoriterecipe',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='favorite', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AlterField(
+            model_name='recipestags',
+            name='recipe',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tag', to='recipes.recipe'),
+        ),
+        migrations.AlterField(
+            model_name='recipestags',
+            name='tag',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tag', to='recipes.tag'),
+        ),
+    ]
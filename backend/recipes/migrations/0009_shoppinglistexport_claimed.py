@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_feedentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppinglistexport',
+            name='claimed',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата начала формирования'),
+        ),
+    ]
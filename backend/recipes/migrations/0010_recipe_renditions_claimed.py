@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_shoppinglistexport_claimed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='renditions_claimed',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Дата начала обработки картинки'),
+        ),
+    ]
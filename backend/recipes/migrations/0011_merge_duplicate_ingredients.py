@@ -0,0 +1,47 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """
+    Оставляет у дублей ингредиента запись с наименьшим id: рецепты
+    переводятся на неё, количества одного рецепта складываются.
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientsInRecipes = apps.get_model('recipes', 'IngredientsInRecipes')
+    duplicates = Ingredient.objects.order_by().values(
+        'name', 'measurement_unit'
+    ).annotate(keep_id=Min('id'), total=Count('id')).filter(total__gt=1)
+    for group in duplicates:
+        keep_id = group.pop('keep_id')
+        group.pop('total')
+        extra_ids = Ingredient.objects.filter(**group).exclude(
+            id=keep_id
+        ).values_list('id', flat=True)
+        for row in IngredientsInRecipes.objects.filter(
+            ingredient_id__in=list(extra_ids)
+        ):
+            kept = IngredientsInRecipes.objects.filter(
+                recipe_id=row.recipe_id, ingredient_id=keep_id
+            ).first()
+            if kept is None:
+                row.ingredient_id = keep_id
+                row.save(update_fields=('ingredient',))
+                continue
+            kept.amount += row.amount
+            kept.save(update_fields=('amount',))
+            row.delete()
+        Ingredient.objects.filter(id__in=list(extra_ids)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_renditions_claimed'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+    ]
@@ -1,4 +1,5 @@
 from colorfield.fields import ColorField
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 
@@ -18,6 +19,12 @@ class Ingredient(models.Model):
 
     class Meta:
         ordering = ('name',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('name', 'measurement_unit'),
+                name='unique_ingredient_name_unit',
+            ),
+        )
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
 
@@ -93,6 +100,29 @@ class Recipe(CreatedModel):
         auto_now_add=True,
         db_index=True,
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='В списках покупок',
+        default=0,
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+    image_renditions = models.JSONField(
+        verbose_name='Уменьшенные копии картинки',
+        null=True,
+        editable=False,
+    )
+    renditions_claimed = models.DateTimeField(
+        verbose_name='Дата начала обработки картинки',
+        null=True,
+        editable=False,
+    )
 
     class Meta:
         ordering = ['-pub_date']
@@ -118,6 +148,7 @@ class FavoriteRecipe(CreatedModel):
         on_delete=models.CASCADE,
         verbose_name='Пользователь',
         related_name='favorite',
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
@@ -138,6 +169,18 @@ class FavoriteRecipe(CreatedModel):
                 fields=['user', 'recipe'], name='unique_user_recipe'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['user', 'recipe'],
+                condition=models.Q(favorite=True),
+                name='favorite_user_recipe_idx',
+            ),
+            models.Index(
+                fields=['user', 'recipe'],
+                condition=models.Q(shopping_cart=True),
+                name='cart_user_recipe_idx',
+            ),
+        ]
         verbose_name = 'Рецепт в избранных или в списке покупок'
         verbose_name_plural = 'Рецепты в избранных или в списке покупок'
 
@@ -182,17 +225,134 @@ class RecipesTags(models.Model):
         Recipe,
         on_delete=models.CASCADE,
         related_name='tag',
+        db_index=False,
     )
     tag = models.ForeignKey(
         Tag,
         on_delete=models.CASCADE,
         related_name='tag',
+        db_index=False,
     )
 
     class Meta:
         ordering = ['-id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'tag'], name='unique_recipe_tag'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['tag', 'recipe'], name='recipestags_tag_recipe_idx'
+            ),
+        ]
         verbose_name = 'Тег рецепта'
         verbose_name_plural = 'Тeги рецептов'
 
     def __str__(self):
         return f'{self.tag.name}, {self.recipe.name}'
+
+
+class ShoppingListExport(CreatedModel):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Формируется'),
+        (DONE, 'Готов'),
+        (FAILED, 'Ошибка'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='shopping_list_exports',
+    )
+    status = models.CharField(
+        max_length=10,
+        verbose_name='Статус',
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        db_index=True,
+    )
+    context = models.JSONField(verbose_name='Данные для документа')
+    file = models.FileField(
+        verbose_name='Файл',
+        upload_to='shopping_lists/',
+        blank=True,
+    )
+    render_time = models.FloatField(
+        verbose_name='Время формирования, мс',
+        null=True,
+        blank=True,
+    )
+    size = models.PositiveIntegerField(
+        verbose_name='Размер, байт',
+        null=True,
+        blank=True,
+    )
+    error = models.TextField(verbose_name='Ошибка', blank=True)
+    claimed = models.DateTimeField(
+        verbose_name='Дата начала формирования',
+        null=True,
+        blank=True,
+    )
+    finished = models.DateTimeField(
+        verbose_name='Дата завершения',
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'Выгрузка списка покупок'
+        verbose_name_plural = 'Выгрузки списков покупок'
+
+    def __str__(self):
+        return f'{self.user}: {self.get_status_display()}'
+
+
+class FeedEntry(models.Model):
+    """
+    Запись ленты подписок: рецепт автора, на которого подписан
+    пользователь. Заполняется при публикации рецепта.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='feed',
+        db_index=False,
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+        related_name='feed_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='+',
+        db_index=False,
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        ordering = ['-pub_date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'], name='feed_user_pub_date_idx'
+            ),
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
@@ -0,0 +1,91 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F
+
+SEARCH_CONFIG = 'russian'
+SQLITE_FTS_TABLE = 'recipes_recipe_fts'
+SQLITE_NAME_WEIGHT = 10.0
+SQLITE_TEXT_WEIGHT = 1.0
+
+SQLITE_FTS_SCHEMA = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts USING fts5(
+        name, text, content='recipes_recipe', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_insert
+    AFTER INSERT ON recipes_recipe
+    BEGIN
+        INSERT INTO recipes_recipe_fts(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_delete
+    AFTER DELETE ON recipes_recipe
+    BEGIN
+        INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_update
+    AFTER UPDATE OF name, text ON recipes_recipe
+    BEGIN
+        INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+        INSERT INTO recipes_recipe_fts(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    """,
+    "INSERT INTO recipes_recipe_fts(recipes_recipe_fts) VALUES ('rebuild')",
+)
+
+
+def ensure_sqlite_fts(using):
+    """
+    Создаёт FTS5-таблицу и триггеры для SQLite. Вызывается после
+    миграций: SQLite пересоздаёт таблицу при изменении схемы,
+    и триггеры при этом теряются.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in SQLITE_FTS_SCHEMA:
+            cursor.execute(statement)
+
+
+def sqlite_match_expression(query):
+    tokens = query.replace('"', ' ').split()
+    return ' '.join('"%s"*' % token for token in tokens)
+
+
+def search_recipes(queryset, query):
+    """
+    Фильтрует рецепты по поисковому запросу и сортирует по релевантности.
+    Совпадения в названии весят больше, чем в описании.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        search_query = SearchQuery(query, config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query),
+        ).order_by('-search_rank', '-pub_date')
+
+    expression = sqlite_match_expression(query)
+    if not expression:
+        return queryset.none()
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        select={'search_rank': f'-bm25({SQLITE_FTS_TABLE}, %s, %s)'},
+        select_params=(SQLITE_NAME_WEIGHT, SQLITE_TEXT_WEIGHT),
+        tables=[SQLITE_FTS_TABLE],
+        where=[
+            f'{SQLITE_FTS_TABLE}.rowid = {table}.id',
+            f'{SQLITE_FTS_TABLE} MATCH %s',
+        ],
+        params=[expression],
+    ).order_by('-search_rank', '-pub_date')
@@ -0,0 +1,115 @@
+import pytest
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import (Ingredient, IngredientsInRecipes, Recipe,
+                            RecipesTags, Tag)
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests',
+    },
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests-versions',
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = TEST_CACHES
+    from django.core.cache import caches
+
+    for alias in TEST_CACHES:
+        caches[alias].clear()
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='user',
+        email='user@example.com',
+        password='Password-1234',
+        first_name='Имя',
+        last_name='Фамилия',
+    )
+
+
+@pytest.fixture
+def author(django_user_model):
+    return django_user_model.objects.create_user(
+        username='author',
+        email='author@example.com',
+        password='Password-1234',
+        first_name='Автор',
+        last_name='Автор',
+    )
+
+
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+@pytest.fixture
+def author_client(author):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=author)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+@pytest.fixture
+def tags():
+    return [
+        Tag.objects.create(name=f'Тэг {i}', slug=f'tag{i}', color=f'#0000F{i}')
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def ingredients():
+    return [
+        Ingredient.objects.create(name=f'продукт {i}', measurement_unit='г')
+        for i in range(5)
+    ]
+
+
+@pytest.fixture
+def make_recipes(author, tags, ingredients):
+    def make_recipes(count, author=author):
+        recipes = []
+        for i in range(count):
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {author.id}-{i}',
+                text='Описание',
+                cooking_time=10,
+                image='recipes/images/test.png',
+            )
+            RecipesTags.objects.create(recipe=recipe, tag=tags[i % 3])
+            IngredientsInRecipes.objects.bulk_create(
+                IngredientsInRecipes(
+                    recipe=recipe, ingredient=ingredient, amount=i + 1
+                )
+                for ingredient in ingredients[:2]
+            )
+            recipes.append(recipe)
+        return recipes
+
+    return make_recipes
+
+
+@pytest.fixture
+def recipe(make_recipes):
+    return make_recipes(1)[0]
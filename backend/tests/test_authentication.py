@@ -0,0 +1,75 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from users.authentication import get_cache_key
+from users.signals import forget_user_tokens
+
+ME = '/api/users/me/'
+
+
+@pytest.fixture
+def token(user):
+    return Token.objects.create(user=user)
+
+
+@pytest.fixture
+def token_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+@pytest.fixture
+def cached(token_client, token):
+    assert token_client.get(ME).status_code == 200
+    key = get_cache_key(token.key)
+    assert cache.get(key) is not None
+    return key
+
+
+@pytest.mark.django_db
+def test_logout_forgets_cached_token(token_client, cached):
+    response = token_client.post('/api/auth/token/logout/')
+    assert response.status_code == 204
+    assert cache.get(cached) is None
+    assert token_client.get(ME).status_code == 401
+
+
+@pytest.mark.django_db
+def test_set_password_forgets_cached_token(token_client, cached):
+    response = token_client.post('/api/users/set_password/', {
+        'current_password': 'Password-1234',
+        'new_password': 'Another-Password-5678',
+    })
+    assert response.status_code == 204
+    assert cache.get(cached) is None
+
+
+@pytest.mark.django_db
+def test_blocking_user_forgets_cached_token(token_client, cached, user):
+    user.blocked = 'b'
+    user.save()
+    assert cache.get(cached) is None
+    assert token_client.get(ME).status_code == 401
+
+
+@pytest.mark.django_db
+def test_blocked_user_is_rejected_on_cache_hit(
+    token_client, cached, user, django_assert_num_queries
+):
+    user.blocked = 'b'
+    user.save()
+    assert token_client.get(ME).status_code == 401
+    assert cache.get(cached) is not None
+    with django_assert_num_queries(0):
+        assert token_client.get(ME).status_code == 401
+
+
+@pytest.mark.django_db
+def test_bulk_update_needs_explicit_forget(token_client, cached, user):
+    type(user).objects.filter(pk=user.pk).update(blocked='b')
+    assert cache.get(cached) is not None
+    forget_user_tokens([user.pk])
+    assert token_client.get(ME).status_code == 401
@@ -0,0 +1,121 @@
+import base64
+import io
+
+import pytest
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.feed import fan_out_recipe
+from recipes.models import FeedEntry, Recipe
+
+
+def image_data():
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8)).save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+def feed_ids(client):
+    response = client.get('/api/recipes/feed/')
+    assert response.status_code == 200
+    return [recipe['id'] for recipe in response.json()['results']]
+
+
+def subscribe(client, author, method='post'):
+    response = getattr(client, method)(f'/api/users/{author.id}/subscribe/')
+    assert response.status_code in (201, 204)
+
+
+@pytest.fixture
+def make_follower(django_user_model):
+    def make_follower(number):
+        follower = django_user_model.objects.create_user(
+            username=f'follower{number}',
+            email=f'follower{number}@example.com',
+            password='Password-1234',
+        )
+        client = APIClient()
+        token = Token.objects.create(user=follower)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    return make_follower
+
+
+@pytest.mark.django_db
+def test_new_recipe_is_fanned_out(
+    user_client, author, author_client, tags, ingredients, settings,
+    tmp_path, django_capture_on_commit_callbacks,
+):
+    settings.MEDIA_ROOT = tmp_path
+    subscribe(user_client, author)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = author_client.post('/api/recipes/', {
+            'name': 'Новый рецепт',
+            'text': 'Описание',
+            'cooking_time': 5,
+            'image': image_data(),
+            'tags': [tags[0].id],
+            'ingredients': [{'id': ingredients[0].id, 'amount': 1}],
+        }, format='json')
+    assert response.status_code == 201, response.json()
+    assert FeedEntry.objects.filter(user__username='user').count() == 1
+    assert feed_ids(user_client) == [response.json()['id']]
+
+
+@pytest.mark.django_db
+def test_follow_backfills_latest_recipes(user_client, author, make_recipes):
+    recipes = make_recipes(3)
+    subscribe(user_client, author)
+    assert FeedEntry.objects.count() == 3
+    assert feed_ids(user_client) == [recipe.id for recipe in recipes[::-1]]
+
+
+@pytest.mark.django_db
+def test_unfollow_removes_author(user_client, author, make_recipes):
+    make_recipes(3)
+    subscribe(user_client, author)
+    subscribe(user_client, author, method='delete')
+    assert FeedEntry.objects.count() == 0
+    assert feed_ids(user_client) == []
+
+
+@pytest.mark.django_db
+def test_timeline_is_trimmed(settings, user_client, author, make_recipes):
+    settings.FEED_LENGTH = 2
+    recipes = make_recipes(2)
+    subscribe(user_client, author)
+    recipe = Recipe.objects.create(
+        author=author,
+        name='Новый рецепт',
+        text='Описание',
+        cooking_time=5,
+        image='recipes/images/test.png',
+    )
+    fan_out_recipe(recipe.id)
+    assert set(FeedEntry.objects.values_list('recipe_id', flat=True)) == {
+        recipe.id, recipes[1].id
+    }
+
+
+@pytest.mark.django_db
+def test_falling_to_threshold_backfills_remaining_followers(
+    settings, author, make_recipes, make_follower
+):
+    settings.FEED_FANOUT_MAX_FOLLOWERS = 1
+    first, second = make_follower(1), make_follower(2)
+    subscribe(first, author)
+    subscribe(second, author)
+    recipes = make_recipes(2)
+    for recipe in recipes:
+        fan_out_recipe(recipe.id)
+    expected = [recipe.id for recipe in recipes[::-1]]
+    assert FeedEntry.objects.count() == 0
+    assert feed_ids(second) == expected
+
+    subscribe(first, author, method='delete')
+    assert FeedEntry.objects.count() == 2
+    assert feed_ids(second) == expected
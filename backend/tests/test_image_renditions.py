@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from PIL import Image
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_image_is_retried_after_timeout(settings, tmp_path, recipe):
+    settings.MEDIA_ROOT = tmp_path
+    call_command('build_image_renditions', processes=1)
+    recipe.refresh_from_db()
+    assert recipe.image_renditions == {}
+    assert recipe.renditions_claimed is not None
+
+    (tmp_path / 'recipes' / 'images').mkdir(parents=True)
+    Image.new('RGB', (64, 48)).save(tmp_path / recipe.image.name)
+    recipe.renditions_claimed = timezone.now() - timedelta(hours=1)
+    recipe.save(update_fields=('renditions_claimed',))
+    call_command('build_image_renditions', processes=1)
+    recipe.refresh_from_db()
+    assert set(recipe.image_renditions) == {'webp', 'jpeg'}
+    assert recipe.renditions_claimed is None
@@ -0,0 +1,17 @@
+import pytest
+
+from recipes.management.commands.loading_ingredients import Command
+from recipes.models import Ingredient
+
+
+@pytest.mark.django_db
+def test_bulk_load_skips_rows_inserted_concurrently():
+    def rows():
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        yield 'соль', 'г'
+        yield 'перец', 'г'
+
+    Command().load_bulk(rows(), batch_size=10, dry_run=False)
+    assert sorted(Ingredient.objects.values_list('name', flat=True)) == [
+        'перец', 'соль'
+    ]
@@ -0,0 +1,42 @@
+import pytest
+from django.core.cache import cache
+
+from api.membership import FAVORITE, RecipeIdSet, get_cache_key, get_version
+from recipes.models import FavoriteRecipe
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def is_favorited(api_client, recipe):
+    return api_client.get(f'/api/recipes/{recipe.id}/').json()['is_favorited']
+
+
+def test_favorite_toggle_is_visible_on_next_read(user_client, recipe):
+    assert not is_favorited(user_client, recipe)
+    url = f'/api/recipes/{recipe.id}/favorite/'
+    assert user_client.post(url).status_code == 201
+    assert is_favorited(user_client, recipe)
+    assert user_client.delete(url).status_code == 204
+    assert not is_favorited(user_client, recipe)
+
+
+def test_changes_outside_the_api_invalidate_cache(user, user_client, recipe):
+    favorite = FavoriteRecipe.objects.create(
+        user=user, recipe=recipe, favorite=True
+    )
+    assert is_favorited(user_client, recipe)
+    favorite.delete()
+    assert not is_favorited(user_client, recipe)
+    FavoriteRecipe.objects.create(user=user, recipe=recipe, favorite=True)
+    assert is_favorited(user_client, recipe)
+
+
+def test_stale_fill_after_concurrent_write_is_not_read(
+    user, user_client, recipe
+):
+    version = get_version(user.id)
+    FavoriteRecipe.objects.create(user=user, recipe=recipe, favorite=True)
+    cache.set(
+        get_cache_key(user.id, FAVORITE, version), RecipeIdSet().to_bytes()
+    )
+    assert is_favorited(user_client, recipe)
@@ -0,0 +1,38 @@
+import base64
+import json
+
+import pytest
+
+
+def encode_cursor(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('cursor', [
+    'not-base64!',
+    encode_cursor([1, 2]),
+    encode_cursor({'p': [1, 2], 'r': 0}),
+    encode_cursor({'p': ['x', 2], 'r': 0}),
+    encode_cursor({'p': ['2022-01-01T00:00:00', 'x'], 'r': 0}),
+    encode_cursor({'p': [None, 2], 'r': 0}),
+    encode_cursor({'p': ['2022-01-01T00:00:00'], 'r': 0}),
+])
+def test_invalid_cursor_returns_404(client, recipe, cursor):
+    response = client.get('/api/recipes/', {'cursor': cursor})
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_cursor_pages_cover_all_recipes(client, make_recipes):
+    recipes = make_recipes(7)
+    response = client.get('/api/recipes/', {'cursor': '', 'limit': 3})
+    seen = []
+    while True:
+        data = response.json()
+        assert 'count' not in data
+        seen.extend(recipe['id'] for recipe in data['results'])
+        if data['next'] is None:
+            break
+        response = client.get(data['next'])
+    assert seen == [recipe.id for recipe in reversed(recipes)]
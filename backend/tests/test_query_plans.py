@@ -0,0 +1,21 @@
+import pytest
+from django.db import connection
+
+from recipes.management.commands.check_query_plans import Command, get_checks
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'postgresql',
+        reason='планы запросов проверяются на PostgreSQL',
+    ),
+]
+
+
+@pytest.mark.parametrize('name', list(get_checks()))
+def test_query_uses_index(name):
+    queryset, expected = get_checks()[name]
+    used = Command().get_used_indexes(queryset)
+    assert any(
+        index.startswith(prefix) for index in used for prefix in expected
+    ), f'{name}: {used}'
@@ -0,0 +1,87 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import IngredientsInRecipes, RecipesTags
+
+LINK_TABLES = (
+    IngredientsInRecipes._meta.db_table,
+    RecipesTags._meta.db_table,
+)
+
+
+def patch_recipe(client, recipe, ingredients, tags):
+    with CaptureQueriesContext(connection) as context:
+        response = client.patch(f'/api/recipes/{recipe.id}/', {
+            'ingredients': [
+                {'id': ingredient.id, 'amount': amount}
+                for ingredient, amount in ingredients
+            ],
+            'tags': [tag.id for tag in tags],
+        }, format='json')
+    assert response.status_code == 200, response.json()
+    return [
+        query['sql'].split()[0].upper()
+        for query in context.captured_queries
+        if any(table in query['sql'] for table in LINK_TABLES)
+        and not query['sql'].startswith('SELECT')
+    ]
+
+
+@pytest.mark.django_db
+def test_unchanged_patch_writes_no_links(
+    author_client, recipe, ingredients, tags
+):
+    writes = patch_recipe(
+        author_client,
+        recipe,
+        [(ingredients[0], 1), (ingredients[1], 1)],
+        [tags[0]],
+    )
+    assert writes == []
+
+
+@pytest.mark.django_db
+def test_amount_change_is_single_bulk_update(
+    author_client, recipe, ingredients, tags
+):
+    writes = patch_recipe(
+        author_client,
+        recipe,
+        [(ingredients[0], 5), (ingredients[1], 7)],
+        [tags[0]],
+    )
+    assert writes == ['UPDATE']
+    assert dict(recipe.ingredient_in_recipe.values_list(
+        'ingredient_id', 'amount'
+    )) == {ingredients[0].id: 5, ingredients[1].id: 7}
+
+
+@pytest.mark.django_db
+def test_add_and_remove_touch_only_changed_links(
+    author_client, recipe, ingredients, tags
+):
+    writes = patch_recipe(
+        author_client,
+        recipe,
+        [(ingredients[0], 1), (ingredients[2], 3)],
+        [tags[1]],
+    )
+    assert sorted(writes) == ['DELETE', 'DELETE', 'INSERT', 'INSERT']
+    assert set(recipe.ingredient_in_recipe.values_list(
+        'ingredient_id', flat=True
+    )) == {ingredients[0].id, ingredients[2].id}
+    assert list(recipe.tags.values_list('id', flat=True)) == [tags[1].id]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('tags_ids', [['x'], [None], [{}], '1', ['1', 1]])
+def test_invalid_tags_return_400(
+    author_client, recipe, ingredients, tags_ids
+):
+    response = author_client.patch(f'/api/recipes/{recipe.id}/', {
+        'ingredients': [{'id': ingredients[0].id, 'amount': 1}],
+        'tags': tags_ids,
+    }, format='json')
+    assert response.status_code == 400
+    assert 'tags' in response.json()
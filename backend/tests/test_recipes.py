@@ -0,0 +1,37 @@
+import pytest
+from django.core.cache import cache
+
+from recipes.models import FavoriteRecipe
+from users.models import Follow
+
+LIST_QUERIES = {
+    'client': 5,
+    'user_client': 8,
+}
+
+
+@pytest.fixture
+def recipe_page(user, author, make_recipes):
+    recipes = make_recipes(60)
+    FavoriteRecipe.objects.bulk_create(
+        FavoriteRecipe(
+            user=user, recipe=recipe, favorite=True, shopping_cart=i % 2
+        )
+        for i, recipe in enumerate(recipes[::3])
+    )
+    Follow.objects.create(user=user, author=author)
+    return recipes
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('client_name', LIST_QUERIES)
+@pytest.mark.parametrize('limit', [6, 50])
+def test_recipe_list_query_count_does_not_depend_on_page_size(
+    request, django_assert_num_queries, recipe_page, client_name, limit
+):
+    api_client = request.getfixturevalue(client_name)
+    cache.clear()
+    with django_assert_num_queries(LIST_QUERIES[client_name]):
+        response = api_client.get('/api/recipes/', {'limit': limit})
+    assert response.status_code == 200
+    assert len(response.json()['results']) == limit
@@ -0,0 +1,26 @@
+import pytest
+
+from recipes.models import Recipe
+
+
+@pytest.mark.django_db
+def test_search_ranks_name_matches_above_text_matches(client, author):
+    in_text = Recipe.objects.create(
+        author=author, name='Суп', text='Почти как борщ',
+        cooking_time=10, image='recipes/images/test.png',
+    )
+    in_name = Recipe.objects.create(
+        author=author, name='Борщ', text='Со сметаной',
+        cooking_time=10, image='recipes/images/test.png',
+    )
+    Recipe.objects.create(
+        author=author, name='Омлет', text='Из яиц',
+        cooking_time=10, image='recipes/images/test.png',
+    )
+    response = client.get('/api/recipes/', {'search': 'борщ'})
+    assert response.status_code == 200
+    data = response.json()
+    assert data['count'] == 2
+    assert [recipe['id'] for recipe in data['results']] == [
+        in_name.id, in_text.id,
+    ]
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.core.asgi import get_asgi_application
+from rest_framework.authtoken.models import Token
+
+from recipes.models import FavoriteRecipe
+
+
+async def asgi_get(path, query, token):
+    communicator = ApplicationCommunicator(get_asgi_application(), {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'path': path,
+        'query_string': query.encode(),
+        'headers': [
+            (b'host', b'testserver'),
+            (b'authorization', f'Token {token}'.encode()),
+        ],
+    })
+    await communicator.send_input({'type': 'http.request'})
+    start = await communicator.receive_output()
+    body = b''
+    while True:
+        message = await communicator.receive_output()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return start['status'], body
+
+
+@pytest.mark.django_db(transaction=True)
+def test_asgi_streams_whole_shopping_list(settings, user, make_recipes):
+    settings.ASYNC_VIEWS = True
+    for recipe in make_recipes(3):
+        FavoriteRecipe.objects.create(
+            user=user, recipe=recipe, shopping_cart=True
+        )
+    token = Token.objects.create(user=user)
+    status, body = async_to_sync(asgi_get)(
+        '/api/recipes/download_shopping_cart/', 'format=json', token.key
+    )
+    assert status == 200
+    assert [row['amount'] for row in json.loads(body)] == [6, 6]
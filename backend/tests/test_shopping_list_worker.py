@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from recipes.models import ShoppingListExport
+
+CONTEXT = {
+    'file_name': 'list.pdf',
+    'title': 'Список покупок',
+    'user': 'Пользователь',
+    'text': ['1. Соль - 5 г'],
+}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_requeues_and_renders_stale_jobs(settings, tmp_path, user):
+    settings.MEDIA_ROOT = tmp_path
+    stale = ShoppingListExport.objects.create(
+        user=user,
+        context=CONTEXT,
+        status=ShoppingListExport.RUNNING,
+        claimed=timezone.now() - timedelta(hours=1),
+    )
+    running = ShoppingListExport.objects.create(
+        user=user,
+        context=CONTEXT,
+        status=ShoppingListExport.RUNNING,
+        claimed=timezone.now(),
+    )
+    call_command('shopping_list_worker', once=True, processes=1)
+    stale.refresh_from_db()
+    running.refresh_from_db()
+    assert stale.status == ShoppingListExport.DONE
+    assert stale.size > 0
+    assert running.status == ShoppingListExport.RUNNING
@@ -0,0 +1,23 @@
+from django.core.cache import cache
+
+from api.versions import TAGS_VERSION_KEY, bump_version, get_version
+
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+def test_version_survives_default_cache_culling(settings, tmp_path):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': FILE_CACHE,
+            'LOCATION': str(tmp_path / 'default'),
+            'OPTIONS': {'MAX_ENTRIES': 30},
+        },
+        'versions': {
+            'BACKEND': FILE_CACHE,
+            'LOCATION': str(tmp_path / 'versions'),
+        },
+    }
+    stamp = bump_version(TAGS_VERSION_KEY)
+    for number in range(400):
+        cache.set(f'favorite_ids_{number}', b'\x01\x00\x00\x00')
+    assert get_version(TAGS_VERSION_KEY) == stamp
@@ -1,10 +1,11 @@
 from django.contrib import admin
 
+from core.admin_tools import LargeTableAdmin, autocomplete_filter
 from users.models import Follow, User
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(LargeTableAdmin):
     fields = (
         'username',
         'email',
@@ -28,12 +29,13 @@ class UserAdmin(admin.ModelAdmin):
         'username',
     )
     list_filter = (
-        'username',
-        'email',
+        'role',
+        'blocked',
         ('is_staff', admin.BooleanFieldListFilter),
     )
     search_fields = (
-        'username',
+        '^username',
+        '^email',
         'first_name',
         'last_name',
     )
@@ -50,10 +52,25 @@ class UserAdmin(admin.ModelAdmin):
 
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = (
         'pk',
         'user',
         'author',
     )
-    search_fields = ('author',)
+    list_select_related = (
+        'user',
+        'author',
+    )
+    list_filter = (
+        autocomplete_filter('user', 'Пользователь'),
+        autocomplete_filter('author', 'Автор'),
+    )
+    autocomplete_fields = (
+        'user',
+        'author',
+    )
+    search_fields = (
+        '=author__username',
+        '=user__username',
+    )
@@ -0,0 +1,58 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from users.models import User
+
+COUNTER_FIELDS = ('recipes_count', 'followers_count')
+CACHED_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.name not in COUNTER_FIELDS
+)
+
+
+def get_cache_key(token_key):
+    digest = hashlib.sha256(token_key.encode()).hexdigest()
+    return f'auth_token_{digest}'
+
+
+def load_user(token_key):
+    """
+    Пользователь по токену: поля берутся из кэша, а при промахе
+    из БД. Счётчики не кэшируются и остаются отложенными полями,
+    поэтому save() такого объекта их не перезапишет.
+    """
+    key = get_cache_key(token_key)
+    values = cache.get(key)
+    if values is None:
+        values = User.objects.filter(
+            auth_token__key=token_key
+        ).values_list(*CACHED_FIELDS).first()
+        if values is None:
+            return None
+        cache.set(key, values, settings.TOKEN_CACHE_TIMEOUT)
+    return User.from_db(DEFAULT_DB_ALIAS, CACHED_FIELDS, values)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену без запроса к БД на каждый запрос.
+    Записи сбрасываются сигналами при удалении токена
+    и изменении пользователя.
+    """
+
+    def authenticate_credentials(self, key):
+        user = load_user(key)
+        if user is None:
+            raise AuthenticationFailed(_('Invalid token.'))
+        if not user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        if user.is_blocked:
+            raise AuthenticationFailed('Пользователь заблокирован.')
+        return user, Token(key=key, user=user)
@@ -30,6 +30,14 @@ class User(AbstractUser):
         choices=STATUS_CHOICES,
         default=STATUS_CHOICES[1][0],
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Рецептов',
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+    )
 
     class Meta:
         ordering = ('username',)
@@ -56,12 +64,14 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Пользователь',
         related_name='follower',
+        db_index=False,
     )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         verbose_name='Автор',
         related_name='following',
+        db_index=False,
     )
 
     class Meta:
@@ -72,6 +82,11 @@ class Follow(models.Model):
                 fields=['user', 'author'], name='unique_following'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}'
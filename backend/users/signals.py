@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from users.authentication import get_cache_key
+from users.models import User
+
+
+def forget_tokens(token_keys):
+    """
+    Запись удаляется сразу и ещё раз после коммита, чтобы
+    параллельный запрос не вернул в кэш старые данные.
+    """
+    keys = [get_cache_key(token_key) for token_key in token_keys]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def forget_user_tokens(user_ids):
+    """
+    Сбрасывает записи всех токенов пользователей. QuerySet.update()
+    не отправляет post_save, поэтому код, который массово меняет
+    кэшируемые поля пользователей, вызывает эту функцию сам.
+    """
+    forget_tokens(
+        Token.objects.filter(user__in=user_ids).values_list('key', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(instance, **kwargs):
+    forget_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def user_changed(instance, created, **kwargs):
+    if not created:
+        forget_user_tokens([instance.pk])
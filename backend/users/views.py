@@ -1,3 +1,5 @@
+from django.db import transaction
+from django.db.models import Value
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
@@ -5,8 +7,11 @@ from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from api.paginations import CustomPageSizePagination
+from api.feed import backfill_author, backfill_followers, remove_author
+from api.paginations import SubscriptionPagination
 from api.serializers import FollowSerializer
+from api.utils import attach_latest_recipes, get_recipes_limit
+from core.counters import change_counter
 from users.models import Follow, User
 from users.serializers import CustomUserSerializer
 
@@ -14,17 +19,24 @@ from users.serializers import CustomUserSerializer
 class CustomUserViewSet(UserViewSet):
     serializer_class = CustomUserSerializer
     queryset = User.objects.all()
-    pagination_class = CustomPageSizePagination
+    pagination_class = SubscriptionPagination
 
     @action(
         detail=False,
         permission_classes=[IsAuthenticated],
     )
     def subscriptions(self, request):
-        data = User.objects.filter(following__user=self.request.user).all()
-        page = self.paginate_queryset(data)
+        data = User.objects.filter(
+            following__user=self.request.user
+        ).annotate(is_subscribed=Value(True))
+        recipes_limit = get_recipes_limit(request)
+        page = attach_latest_recipes(
+            self.paginate_queryset(data), recipes_limit
+        )
         serializer = FollowSerializer(
-            page, context={'request': request}, many=True
+            page,
+            context={'request': request, 'recipes_limit': recipes_limit},
+            many=True,
         )
         return self.get_paginated_response(serializer.data)
 
@@ -49,8 +61,14 @@ class CustomUserViewSet(UserViewSet):
                     {'errors': 'Вы уже подписаны на данного пользователя.'},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            Follow.objects.create(author=author, user=self.request.user)
-            serializer = FollowSerializer(author, context={'request': request})
+            with transaction.atomic():
+                Follow.objects.create(author=author, user=self.request.user)
+                change_counter(User, author.id, 'followers_count', 1)
+                backfill_author(self.request.user.id, author.id)
+            serializer = FollowSerializer(author, context={
+                'request': request,
+                'recipes_limit': get_recipes_limit(request),
+            })
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         if self.request.user == author:
@@ -66,5 +84,9 @@ class CustomUserViewSet(UserViewSet):
                 {'errors': 'Вы не подписаны на данного пользователя.'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        follow.delete()
+        with transaction.atomic():
+            deleted, _ = follow.delete()
+            change_counter(User, author.id, 'followers_count', -deleted)
+            remove_author(self.request.user.id, author.id)
+            backfill_followers(author.id)
         return Response(status=status.HTTP_204_NO_CONTENT)
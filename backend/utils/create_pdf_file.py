@@ -1,7 +1,12 @@
+import hashlib
 import io
+import json
 import os
-from typing import Dict, List
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
 
+from django.conf import settings
 from django.http import FileResponse
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.lib.pagesizes import A4
@@ -10,7 +15,66 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
 
+from core.metrics import span
+
 FONTS_ROOT = os.path.dirname(os.path.abspath(__file__))
+FONT_NAME = 'timesnewromanpsmt'
+
+
+class RenderCache:
+    """
+    LRU-кэш готовых PDF в памяти процесса.
+    Ограничен числом записей и суммарным размером в байтах.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = value
+            self.size += len(value)
+            while (
+                len(self.entries) > self.max_entries
+                or self.size > self.max_bytes
+            ):
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+pdf_cache = RenderCache(
+    settings.PDF_CACHE_MAX_ENTRIES, settings.PDF_CACHE_MAX_BYTES
+)
+_font_lock = threading.Lock()
+_font_registered = False
+
+
+def register_font():
+    global _font_registered
+    if _font_registered:
+        return
+    with _font_lock:
+        if not _font_registered:
+            font_fullpath = os.path.join(
+                FONTS_ROOT, 'fonts/', 'timesnewromanpsmt.ttf'
+            )
+            pdfmetrics.registerFont(TTFont(FONT_NAME, font_fullpath))
+            _font_registered = True
 
 
 def add_title(doc: List, title: str, size: int, space: int, ta: int):
@@ -20,7 +84,7 @@ def add_title(doc: List, title: str, size: int, space: int, ta: int):
             title,
             ParagraphStyle(
                 name='name',
-                fontName='timesnewromanpsmt',
+                fontName=FONT_NAME,
                 fontSize=size,
                 alignment=ta,
             ),
@@ -37,7 +101,7 @@ def add_paragraphs(doc: List, text: str, size: int):
                 line,
                 ParagraphStyle(
                     name='line',
-                    fontName='timesnewromanpsmt',
+                    fontName=FONT_NAME,
                     fontSize=size,
                     alignment=TA_LEFT,
                 ),
@@ -47,13 +111,17 @@ def add_paragraphs(doc: List, text: str, size: int):
     return doc
 
 
-def create_pdf(obj: Dict[str, str]):
-    buffer = io.BytesIO()
-
-    font_fullpath = os.path.join(
-        FONTS_ROOT, 'fonts/', 'timesnewromanpsmt.ttf'
+def get_cache_key(obj: Dict[str, str]) -> str:
+    content = json.dumps(
+        [obj['title'], obj['user'], obj['text']], ensure_ascii=False
     )
-    pdfmetrics.registerFont(TTFont('timesnewromanpsmt', font_fullpath))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+@span('pdf_render')
+def render_pdf(obj: Dict[str, str]) -> bytes:
+    buffer = io.BytesIO()
+    register_font()
 
     doc = add_title([], obj['title'], 18, 12, TA_CENTER)
     doc = add_title(doc, obj['user'], 12, 12, TA_LEFT)
@@ -66,5 +134,15 @@ def create_pdf(obj: Dict[str, str]):
         bottomMargin=12,
     )
     pdf.build(add_paragraphs(doc, obj['text'], 12))
-    buffer.seek(0)
-    return FileResponse(buffer, as_attachment=True, filename=obj['file_name'])
+    return buffer.getvalue()
+
+
+def create_pdf(obj: Dict[str, str]):
+    key = get_cache_key(obj)
+    content = pdf_cache.get(key)
+    if content is None:
+        content = render_pdf(obj)
+        pdf_cache.set(key, content)
+    return FileResponse(
+        io.BytesIO(content), as_attachment=True, filename=obj['file_name']
+    )
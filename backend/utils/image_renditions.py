@@ -0,0 +1,93 @@
+import io
+import os
+from typing import Dict
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from core.metrics import span
+
+RENDITIONS_ROOT = 'recipes/renditions/'
+RENDITION_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def rendition_name(name: str, width: int, kind: str) -> str:
+    base = os.path.splitext(os.path.basename(name))[0]
+    return f'{RENDITIONS_ROOT}{base}_{width}.{kind}'
+
+
+def get_widths(original_width: int):
+    """
+    Ширины уменьшенных копий: картинки не увеличиваются,
+    маленький оригинал даёт одну копию своей ширины.
+    """
+    widths = [
+        width for width in settings.IMAGE_RENDITION_WIDTHS
+        if width < original_width
+    ]
+    return widths or [original_width]
+
+
+def encode(image: Image.Image, kind: str) -> bytes:
+    image_format, options = RENDITION_FORMATS[kind]
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+@span('image_renditions')
+def build_renditions(name: str) -> Dict[str, Dict[str, str]]:
+    """
+    Строит копии картинки рецепта фиксированной ширины в WebP и JPEG.
+    Возвращает {формат: {ширина: имя файла в хранилище}}.
+    """
+    with default_storage.open(name) as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image = image.convert('RGB')
+    renditions = {kind: {} for kind in RENDITION_FORMATS}
+    for width in get_widths(image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        for kind in RENDITION_FORMATS:
+            path = rendition_name(name, width, kind)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            renditions[kind][str(width)] = default_storage.save(
+                path, ContentFile(encode(resized, kind))
+            )
+    return renditions
+
+
+def delete_renditions(renditions) -> None:
+    for paths in (renditions or {}).values():
+        for path in paths.values():
+            default_storage.delete(path)
+
+
+def get_image_srcset(recipe, request=None) -> Dict[str, str]:
+    """
+    Карта {формат: значение атрибута srcset}.
+    Пока копии не готовы, отдаётся только оригинал.
+    """
+    def build_url(path):
+        url = default_storage.url(path)
+        if request is None:
+            return url
+        return request.build_absolute_uri(url)
+
+    if not recipe.image_renditions:
+        return {'original': build_url(recipe.image.name)}
+    return {
+        kind: ', '.join(
+            f'{build_url(path)} {width}w'
+            for width, path in sorted(
+                paths.items(), key=lambda item: int(item[0])
+            )
+        )
+        for kind, paths in recipe.image_renditions.items()
+    }
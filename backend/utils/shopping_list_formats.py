@@ -0,0 +1,67 @@
+import csv
+import json
+from typing import Iterable, Iterator, Tuple
+
+from django.http import StreamingHttpResponse
+
+Row = Tuple[str, str, int]
+
+
+class Echo:
+    """
+    Псевдофайл для csv.writer: возвращает строку вместо записи.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_txt(title: str, user: str, rows: Iterable[Row]) -> Iterator[str]:
+    yield f'{title}\n{user}\n\n'
+    for idx, (name, unit, total) in enumerate(rows):
+        yield f'{idx + 1}. {name.capitalize()} - {total} {unit}\n'
+
+
+def iter_csv(title: str, user: str, rows: Iterable[Row]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for name, unit, total in rows:
+        yield writer.writerow((name.capitalize(), total, unit))
+
+
+def iter_json(title: str, user: str, rows: Iterable[Row]) -> Iterator[str]:
+    yield '['
+    separator = ''
+    for name, unit, total in rows:
+        yield separator + json.dumps(
+            {
+                'name': name.capitalize(),
+                'amount': total,
+                'measurement_unit': unit,
+            },
+            ensure_ascii=False,
+        )
+        separator = ','
+    yield ']'
+
+
+FORMATS = {
+    'txt': ('text/plain; charset=utf-8', iter_txt),
+    'csv': ('text/csv; charset=utf-8', iter_csv),
+    'json': ('application/json', iter_json),
+}
+
+
+def stream_shopping_list(
+    file_format: str, file_name: str, title: str, user: str,
+    rows: Iterable[Row],
+) -> StreamingHttpResponse:
+    """
+    Отдаёт список покупок по мере чтения строк из курсора.
+    """
+    content_type, render = FORMATS[file_format]
+    response = StreamingHttpResponse(
+        render(title, user, rows), content_type=content_type
+    )
+    response['Content-Disposition'] = f'attachment; filename="{file_name}"'
+    return response